@@ -1,38 +1,131 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
 
+# WALLET_ONEDIR=1 builds dist/PersonalWallet-onedir/ instead of the one-file exe.
+# One-dir skips unpacking to a temp folder on every launch; compare the two with
+# bench_startup.py.
+ONEDIR = os.environ.get("WALLET_ONEDIR") == "1"
+
+# Only the Tk/Agg backend is used; everything else Analysis pulls in through
+# matplotlib, numpy and the stdlib is dead weight that one-file has to unpack.
+EXCLUDES = [
+    # matplotlib backends other than TkAgg/Agg
+    'matplotlib.backends.backend_cairo',
+    'matplotlib.backends.backend_gtk3',
+    'matplotlib.backends.backend_gtk3agg',
+    'matplotlib.backends.backend_gtk3cairo',
+    'matplotlib.backends.backend_gtk4',
+    'matplotlib.backends.backend_gtk4agg',
+    'matplotlib.backends.backend_gtk4cairo',
+    'matplotlib.backends.backend_macosx',
+    'matplotlib.backends.backend_nbagg',
+    'matplotlib.backends.backend_pdf',
+    'matplotlib.backends.backend_pgf',
+    'matplotlib.backends.backend_ps',
+    'matplotlib.backends.backend_qt',
+    'matplotlib.backends.backend_qt5',
+    'matplotlib.backends.backend_qt5agg',
+    'matplotlib.backends.backend_qt5cairo',
+    'matplotlib.backends.backend_qtagg',
+    'matplotlib.backends.backend_qtcairo',
+    'matplotlib.backends.backend_svg',
+    'matplotlib.backends.backend_template',
+    'matplotlib.backends.backend_webagg',
+    'matplotlib.backends.backend_webagg_core',
+    'matplotlib.backends.backend_wx',
+    'matplotlib.backends.backend_wxagg',
+    'matplotlib.backends.backend_wxcairo',
+    'matplotlib.backends.qt_compat',
+    'matplotlib.backends.qt_editor',
+    'PyQt5',
+    'PyQt6',
+    'PySide2',
+    'PySide6',
+    'gi',
+    'wx',
+    'cairo',
+    'PIL.ImageQt',
+    # test suites and build tooling
+    'matplotlib.tests',
+    'matplotlib.testing',
+    'numpy.tests',
+    'numpy._core.tests',
+    'numpy.f2py',
+    'numpy.distutils',
+    'tkinter.test',
+    'unittest.test',
+    'pytest',
+    'setuptools',
+    'pkg_resources',
+    'distutils',
+    'IPython',
+]
 
 a = Analysis(
     ['finalVer.py'],
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    # matplotlib is imported lazily inside functions; keep the backend explicit
+    hiddenimports=['matplotlib.backends.backend_tkagg'],
     hookspath=[],
-    hooksconfig={},
+    hooksconfig={
+        'matplotlib': {'backends': ['TkAgg', 'Agg']},
+    },
     runtime_hooks=[],
-    excludes=[],
+    excludes=EXCLUDES,
     noarchive=False,
-    optimize=0,
+    # 1 strips asserts; 2 would also strip docstrings that matplotlib and
+    # numpy still read at import time
+    optimize=1,
 )
 pyz = PYZ(a.pure)
 
-exe = EXE(
-    pyz,
-    a.scripts,
-    a.binaries,
-    a.datas,
-    [],
-    name='PersonalWallet',
-    debug=False,
-    bootloader_ignore_signals=False,
-    strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
-    console=False,
-    disable_windowed_traceback=False,
-    argv_emulation=False,
-    target_arch=None,
-    codesign_identity=None,
-    entitlements_file=None,
-)
+if ONEDIR:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        [],
+        exclude_binaries=True,
+        name='PersonalWallet',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=False,
+        console=False,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+    )
+    coll = COLLECT(
+        exe,
+        a.binaries,
+        a.datas,
+        strip=False,
+        upx=False,
+        name='PersonalWallet-onedir',
+    )
+else:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        a.binaries,
+        a.datas,
+        [],
+        name='PersonalWallet',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        # UPX-compressed DLLs have to be decompressed on every launch
+        upx=False,
+        upx_exclude=[],
+        runtime_tmpdir=None,
+        console=False,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+    )
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# Micro-benchmark: Decimal amounts (the path finalVer used per row) against the
+# integer-cents Money type and its MoneyArray column form.
+#
+#   python bench_money.py                 -> 200k amounts, best of 5
+#   python bench_money.py --n 1000000 --repeat 3
+#
+# Each line reports the best wall time of --repeat runs for the same work on
+# both representations, and the speed-up of the Money side.
+# The parse_amount rows compare the old Decimal parse (left) with the current
+# parse_amount (right), which keeps Decimal(clean) and only adds validation.
+import argparse
+import random
+import sys
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from wallet import (
+    CATEGORY_MAP,
+    Money,
+    MoneyArray,
+    from_cents,
+    parse_amount,
+    round_cents,
+    to_cents,
+)
+
+
+def decimal_parse(text):
+    # parse_amount before Money: the baseline every parse path is measured against
+    clean = text.strip().replace("$", "").replace(",", "")
+    if clean.endswith("-"):
+        clean = "-" + clean[:-1]
+    return Decimal(clean)
+
+
+def decimal_fmt(amount):
+    # fmt_amount before Money
+    sign = "+" if amount >= 0 else "-"
+    return f"{sign}${abs(amount):,.2f}"
+
+
+def best(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def report(name, old_ms, new_ms):
+    print(
+        f"  {name:<28} Decimal {old_ms:9.2f} ms   Money {new_ms:9.2f} ms   x{old_ms / new_ms:5.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decimal vs Money micro-benchmark")
+    parser.add_argument("--n", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts = [
+        f"{rng.choice('-+')}{rng.randint(0, 250_000) / 100:.2f}" for _ in range(args.n)
+    ]
+    cats = CATEGORY_MAP["expense"]
+    keys = [rng.choice(cats) for _ in range(args.n)]
+    decimals = [decimal_parse(t) for t in texts]
+    monies = [Money.parse(t) for t in texts]
+    column = MoneyArray(monies)
+    print(f"{args.n:,} amounts, best of {args.repeat}")
+
+    report(
+        "parse",
+        best(lambda: [decimal_parse(t) for t in texts], args.repeat),
+        best(lambda: [Money.parse(t) for t in texts], args.repeat),
+    )
+    report(
+        "parse (parse_amount)",
+        best(lambda: [decimal_parse(t) for t in texts], args.repeat),
+        best(lambda: [parse_amount(t) for t in texts], args.repeat),
+    )
+    report(
+        "parse to cents (form/import)",
+        best(
+            lambda: [from_cents(to_cents(decimal_parse(t))) for t in texts], args.repeat
+        ),
+        best(lambda: [round_cents(parse_amount(t)) for t in texts], args.repeat),
+    )
+    report(
+        "format",
+        best(lambda: [decimal_fmt(a) for a in decimals], args.repeat),
+        best(lambda: [m.format() for m in monies], args.repeat),
+    )
+    old_sum = best(lambda: sum(decimals, Decimal(0)), args.repeat)
+    report("sum (objects)", old_sum, best(lambda: Money.sum(monies), args.repeat))
+    report("sum (MoneyArray)", old_sum, best(column.total, args.repeat))
+
+    def decimal_split():
+        income = sum((a for a in decimals if a > 0), Decimal(0))
+        return income, income - sum(decimals, Decimal(0))
+
+    label = (
+        "income/expense (NumPy)" if column.to_numpy() is not None else "income/expense"
+    )
+    report(
+        label, best(decimal_split, args.repeat), best(column.split_total, args.repeat)
+    )
+
+    def decimal_group():
+        sums = defaultdict(Decimal)
+        for key, amount in zip(keys, decimals):
+            sums[key] += amount
+        return sums
+
+    report(
+        "sum by category",
+        best(decimal_group, args.repeat),
+        best(lambda: column.group_total(keys), args.repeat),
+    )
+
+    assert sum(decimals, Decimal(0)) == column.total().to_decimal()
+    assert [decimal_fmt(a) for a in decimals[:1000]] == [
+        m.format() for m in monies[:1000]
+    ]
+    print(
+        f"  per amount: Decimal {sys.getsizeof(decimals[0])} B, "
+        f"Money {sys.getsizeof(monies[0]) + sys.getsizeof(monies[0].cents)} B, "
+        f"MoneyArray {column.cents.itemsize} B"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Memory benchmark: the per-row dict finalVer used to build for every
+# transaction against the slotted wallet.Transaction record.
+#
+#   python bench_records.py                 -> 100k rows
+#   python bench_records.py --n 1000000
+#
+# Both layouts are built from the same synthetic ledger (bench_wallet.generate)
+# and measured with tracemalloc, so the numbers include the date strings, month
+# keys and per-row category copies each layout keeps alive. Build times are
+# taken while tracing and only comparable with each other.
+import argparse
+import gc
+import time
+import tracemalloc
+from decimal import Decimal
+
+from bench_wallet import generate
+from wallet import BASE_CURRENCY, DEFAULT_ACCOUNT, make_transaction, parse_ts
+
+
+def make_dict(amount, category, description, dt_str):
+    # make_transaction before Transaction: eleven keys, date and month as strings
+    return {
+        "id": None,
+        "amount": amount,
+        "type": "Income" if amount >= 0 else "Expense",
+        "category": category,
+        "description": description,
+        "date": dt_str,
+        "ts": parse_ts(dt_str),
+        "ym": dt_str[:7],
+        "account": DEFAULT_ACCOUNT,
+        "currency": BASE_CURRENCY,
+        "orig_amount": amount,
+    }
+
+
+def measure(name, build, raw):
+    # category/description come from the "database" as fresh strings per row
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = [build(a, "".join(c), "".join(d), "".join(dt)) for a, c, d, dt in raw]
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(
+        f"  {name:<12} {size / 2**20:8.1f} MiB  {size / len(rows):6.0f} B/row"
+        f"  build {elapsed * 1000:8.1f} ms"
+    )
+    del rows
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="transaction record memory")
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    raw = [
+        (Decimal(tr.amount), list(tr.category), list(tr.description), list(tr.date))
+        for tr in generate(args.n, args.seed)
+    ]
+    print(f"{len(raw):,} transactions")
+    old = measure("dict", make_dict, raw)
+    new = measure("Transaction", make_transaction, raw)
+    print(f"  {old / new:.1f}x less memory per row")
+
+
+if __name__ == "__main__":
+    main()
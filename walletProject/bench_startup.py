@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# Time-to-first-window benchmark for the PersonalWallet builds.
+#
+#   pyinstaller PersonalWallet.spec                       -> dist/PersonalWallet(.exe)
+#   WALLET_ONEDIR=1 pyinstaller PersonalWallet.spec       -> dist/PersonalWallet-onedir/
+#   python bench_startup.py --runs 10
+#
+# Each launch gets WALLET_TIMING (the app appends its own startup marks there)
+# and WALLET_EXIT_AFTER_START, so the process exits as soon as the window is up
+# and the wall time of the process is the time-to-first-window seen by the user.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+EXE_SUFFIX = ".exe" if sys.platform == "win32" else ""
+
+TARGETS = {
+    "one-file": [os.path.join(HERE, "dist", "PersonalWallet" + EXE_SUFFIX)],
+    "one-dir": [
+        os.path.join(
+            HERE, "dist", "PersonalWallet-onedir", "PersonalWallet" + EXE_SUFFIX
+        )
+    ],
+    "script": [sys.executable, os.path.join(HERE, "finalVer.py")],
+}
+
+
+def run_once(cmd, tmpdir, index):
+    timing_file = os.path.join(tmpdir, f"timing-{index}.jsonl")
+    env = dict(os.environ)
+    env["WALLET_TIMING"] = timing_file
+    env["WALLET_EXIT_AFTER_START"] = "1"
+    # a fresh database per launch so every run seeds the same sample data
+    env["WALLET_DB"] = os.path.join(tmpdir, f"wallet-{index}.db")
+    start = time.perf_counter()
+    subprocess.run(cmd, env=env, check=True, timeout=120)
+    wall = (time.perf_counter() - start) * 1000
+    marks = {}
+    if os.path.exists(timing_file):
+        with open(timing_file, encoding="utf-8") as f:
+            marks = json.loads(f.readline())
+    return wall, marks.get("first_window")
+
+
+def summarize(name, values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return f"  {name:<22} n/a"
+    return (
+        f"  {name:<22} median {statistics.median(values):8.1f} ms"
+        f"   min {min(values):8.1f} ms   max {max(values):8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PersonalWallet time-to-first-window")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--targets",
+        nargs="+",
+        default=["one-file", "one-dir"],
+        choices=sorted(TARGETS),
+    )
+    args = parser.parse_args()
+
+    for name in args.targets:
+        cmd = TARGETS[name]
+        if not os.path.exists(cmd[-1]):
+            print(f"{name}: {cmd[-1]} not found, skipping")
+            continue
+        walls, in_app = [], []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for i in range(args.runs):
+                wall, first_window = run_once(cmd, tmpdir, i)
+                walls.append(wall)
+                in_app.append(first_window)
+        print(f"{name} ({args.runs} runs)")
+        print(summarize("launch -> exit", walls))
+        print(summarize("in-app first window", in_app))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+# Headless benchmark for the wallet logic behind the Tk tabs.
+#
+#   python bench_wallet.py                          -> 10k and 100k rows
+#   python bench_wallet.py --sizes 1000000 --ops 500
+#   python bench_wallet.py --save baseline.json
+#   python bench_wallet.py --baseline baseline.json --tolerance 0.25
+#
+# No window is created: the benchmark calls the same store / aggregate / budget /
+# export code that TransactionsUI, AnalyticsUI, BudgetUI and the export dialog
+# run, on a synthetic ledger with a realistic mix of salaries, rent, bills and
+# day-to-day spending. Every step reports latency percentiles (untraced runs) and
+# the peak of Python allocations from one extra traced run (tracemalloc; SQLite's
+# own page cache is not included, steps with side effects are not re-run).
+# With --baseline the run exits with status 1 if any p50 got slower than the
+# tolerance allows.
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+
+import wallet as app
+
+PAGE_ROWS = 200  # VirtualTable page size in finalVer.py
+
+# Category names come from wallet.CATEGORY_MAP so the synthetic ledger has the
+# same category cardinality as real data (import maps unknown names to "Other").
+INCOME = app.CATEGORY_MAP["income"]
+EXPENSE = app.CATEGORY_MAP["expense"]
+FIXED = {"Salary": INCOME, "Bonus": INCOME, "Rent": EXPENSE, "Bills": EXPENSE}
+# (events per month, median amount, spread) for the day-to-day expense side
+PROFILES = {
+    "Food": (14.0, 38.0, 0.6),
+    "Transportation": (10.0, 12.0, 0.5),
+    "Entertainment": (4.0, 30.0, 0.8),
+    "Shopping": (3.0, 65.0, 0.9),
+    "Healthcare": (0.6, 90.0, 0.7),
+    "Education": (0.3, 150.0, 0.6),
+    "Travel": (0.2, 400.0, 0.8),
+    "Other": (2.0, 25.0, 1.0),
+}
+_missing = [c for c, names in FIXED.items() if c not in names]
+_missing += [c for c in PROFILES if c not in EXPENSE]
+if _missing:
+    raise SystemExit(f"categories not in wallet.CATEGORY_MAP: {_missing}")
+# (category, events per month, median amount, spread), in CATEGORY_MAP order
+SPENDING = [(cat, *PROFILES[cat]) for cat in EXPENSE if cat in PROFILES]
+WORDS = [
+    "grocery",
+    "coffee",
+    "taxi",
+    "cinema",
+    "clothes",
+    "pharmacy",
+    "books",
+    "lunch",
+    "fuel",
+    "gift",
+    "market",
+    "online",
+    "dinner",
+    "bus",
+    "course",
+]
+SEARCHES = [
+    "coffee",
+    "food",
+    ">500",
+    "last 3 months",
+    "2024-01..2024-06",
+    "grocery market",
+]
+
+
+def monthly_fixed(rng):
+    # (amount, category, description, day of month) for salary, rent and bills
+    yield 2500 + rng.randint(-100, 300), "Salary", "Monthly salary", 1
+    if rng.random() < 0.2:
+        yield rng.randint(100, 800), "Bonus", "Side project", 15
+    yield -1200, "Rent", "Rent", 3
+    for name, day in (("Electricity bill", 10), ("Internet", 12), ("Phone", 20)):
+        yield -round(rng.uniform(30, 140), 2), "Bills", name, day
+
+
+def generate(n, seed=1, end=None):
+    # Synthetic ledger of about n rows ending at `end`, oldest first.
+    rng = random.Random(seed)
+    per_month = 6.2 + sum(rate for _, rate, _, _ in SPENDING)
+    months = max(1, round(n / per_month))
+    end = end or date.today()
+    first = date(end.year, end.month, 1)
+    for _ in range(months - 1):
+        first = (first - timedelta(days=1)).replace(day=1)
+    rows = []
+    month = first
+    while len(rows) < n:
+        days = ((month + timedelta(days=32)).replace(day=1) - month).days
+        for amount, cat, desc, day in monthly_fixed(rng):
+            rows.append((Decimal(str(amount)), cat, desc, month.replace(day=day), 9))
+        for cat, rate, median, spread in SPENDING:
+            for _ in range(_poisson(rng, rate)):
+                amount = round(rng.lognormvariate(0, spread) * median, 2)
+                desc = " ".join(rng.sample(WORDS, 2))
+                day = month + timedelta(days=rng.randrange(days))
+                rows.append((-Decimal(str(amount)), cat, desc, day, rng.randint(7, 22)))
+        month = month + timedelta(days=days)
+    rows = rows[:n]
+    rows.sort(key=lambda r: (r[3], r[4]))
+    return [
+        app.make_transaction(
+            amount, cat, desc, f"{day.isoformat()} {hour:02d}:{rng.randrange(60):02d}"
+        )
+        for amount, cat, desc, day, hour in rows
+    ]
+
+
+def _poisson(rng, lam):
+    # Knuth; lam is small (< 20) here
+    limit, k, p = pow(2.718281828459045, -lam), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+class Recorder:
+    def __init__(self):
+        self.results = {}
+
+    def measure(self, name, fn, repeat=1, memory=True):
+        # tracing slows allocation-heavy code several times over, so latency
+        # comes from untraced runs and the peak from one more traced run
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        peak = None
+        if memory:
+            tracemalloc.start()
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        self.record(name, samples, peak)
+
+    def record(self, name, samples, peak=None):
+        samples = sorted(samples)
+        self.results[name] = {
+            "n": len(samples),
+            "p50": _pct(samples, 50),
+            "p95": _pct(samples, 95),
+            "p99": _pct(samples, 99),
+            "max": samples[-1],
+            "peak_kb": None if peak is None else peak / 1024,
+        }
+        r = self.results[name]
+        memory = "-" if peak is None else f"{r['peak_kb']:,.0f} KiB"
+        print(
+            f"  {name:<32} n={r['n']:<5} p50 {r['p50']:9.2f}  p95 {r['p95']:9.2f}"
+            f"  p99 {r['p99']:9.2f}  max {r['max']:9.2f} ms   peak {memory:>12}"
+        )
+
+
+def _pct(samples, q):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[q - 1]
+
+
+def run_size(n, ops, seed, tmpdir):
+    rec = Recorder()
+    rng = random.Random(seed)
+    print(f"ledger: {n:,} transactions")
+
+    holder = {}
+    rec.measure("generate", lambda: holder.update(rows=generate(n, seed)))
+    rows = holder["rows"]
+
+    path = os.path.join(tmpdir, f"bench-{n}.db")
+    store = app.LedgerStore(path)
+
+    def bulk_insert():
+        with store.conn:
+            for batch in app.batches(rows, app.IMPORT_BATCH):
+                store.insert_batch(batch)
+        store.optimize()
+
+    rec.measure("store.bulk_insert", bulk_insert, memory=False)
+
+    # startup: what TransactionsUI / BudgetUI do when the app opens
+    rec.measure(
+        "aggregates.from_store",
+        lambda: app.LedgerAggregates.from_store(store),
+        repeat=3,
+    )
+    rec.measure("budget.reload", lambda: app.BudgetEngine(store), repeat=3)
+
+    # AnalyticsUI.update_from_transactions / BudgetUI.update_from_transactions
+    rec.measure(
+        "analytics.from_transactions",
+        lambda: app.analytics_from_transactions(rows),
+        repeat=3,
+    )
+    engine = app.BudgetEngine(store)
+    engine.set_budget(Decimal("3000"))
+    engine.set_budget(Decimal("400"), "Food")
+    rec.measure(
+        "budget.load_transactions", lambda: engine.load_transactions(rows), repeat=3
+    )
+
+    agg = app.LedgerAggregates.from_store(store)
+    for name in app.RANGES[:-1]:
+        bounds = app.range_bounds(name)
+        rec.measure(
+            f"analytics.snapshot[{name}]",
+            lambda: app.compute_analytics(agg.snapshot(bounds)),
+            repeat=ops,
+        )
+
+    # TransactionsUI._add_rows / _save_edit / _undo_last, one row at a time
+    add_ms, edit_ms, undo_ms = [], [], []
+    now = time.strftime("%Y-%m-%d %H:%M")
+    for _ in range(ops):
+        start = time.perf_counter()
+        tr = app.make_transaction(
+            Decimal(-rng.randint(100, 9999)) / 100, "Food", "bench add", now
+        )
+        store.add_many([tr])
+        agg.add(tr)
+        engine.apply([], [tr])
+        agg.snapshot()
+        add_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        new = app.make_transaction(
+            tr.amount * 2, "Shopping", "bench edit", tr.date, tr.id
+        )
+        store.update(new)
+        agg.remove(tr)
+        agg.add(new)
+        engine.apply([tr], [new])
+        edit_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        store.replace(delete_ids=[new.id])
+        agg.remove(new)
+        engine.apply([new], [])
+        agg.largest_expense()
+        undo_ms.append((time.perf_counter() - start) * 1000)
+    rec.record("transactions.add", add_ms)
+    rec.record("transactions.edit", edit_ms)
+    rec.record("transactions.delete", undo_ms)
+
+    # VirtualTable paging and the search bar
+    total = store.count()
+    rec.measure(
+        "table.page",
+        lambda: store.page(rng.randrange(total), PAGE_ROWS),
+        repeat=ops,
+    )
+    for text in SEARCHES:
+
+        def search(text=text):
+            where = app.build_search(text, has_fts=store.has_fts)
+            store.count(where)
+            store.page(0, PAGE_ROWS, where)
+
+        rec.measure(f"search[{text}]", search, repeat=max(3, ops // 20))
+
+    # ExportDialog worker
+    for suffix in (".csv", ".csv.gz"):
+        out = os.path.join(tmpdir, f"export-{n}{suffix}")
+        rec.measure(f"export{suffix}", lambda: app.write_csv(store, out))
+    store.close()
+    return rec.results
+
+
+def compare(results, baseline, tolerance):
+    # p50 regressions beyond tolerance; small absolute changes are noise
+    regressions = []
+    for size, steps in results.items():
+        for name, r in steps.items():
+            if name == "generate":
+                continue  # the harness itself, not wallet code
+            old = baseline.get(size, {}).get(name)
+            if (
+                old
+                and r["p50"] > old["p50"] * (1 + tolerance)
+                and r["p50"] - old["p50"] > 1
+            ):
+                regressions.append((size, name, old["p50"], r["p50"]))
+    for size, name, old, new in regressions:
+        print(f"REGRESSION {size} {name}: p50 {old:.2f} -> {new:.2f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PersonalWallet headless benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument(
+        "--ops", type=int, default=200, help="samples for per-operation steps"
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="write results as JSON")
+    parser.add_argument("--baseline", help="compare against a saved JSON run")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n in args.sizes:
+            results[str(n)] = run_size(n, args.ops, args.seed, tmpdir)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
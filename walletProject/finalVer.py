@@ -1,60 +1,626 @@
 # -*- coding: utf-8 -*-
+import time
+
+_T0 = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from datetime import datetime
-from collections import defaultdict, OrderedDict
+from datetime import datetime, date
+from collections import deque, OrderedDict
 from decimal import Decimal, InvalidOperation
-import csv
+import json
+import math
+import os
+import queue
+import sqlite3
+import sys
+import threading
+
+from wallet import (
+    ALL_CATEGORIES,
+    BASE_CURRENCY,
+    CATEGORY_MAP,
+    CURRENCY,
+    CURRENCY_SYMBOLS,
+    DATE_FMT,
+    DEFAULT_ACCOUNT,
+    EPOCH_ORDINAL,
+    MAX_BUCKETS,
+    MONTHLY,
+    RANGES,
+    RECENT_MONTHS,
+    TX_ADDED,
+    TX_CLEARED,
+    TX_RELOADED,
+    WEEKLY,
+    AnalyticsWorker,
+    BudgetEngine,
+    EventBus,
+    FxRates,
+    LedgerAggregates,
+    LedgerStore,
+    Money,
+    RecurringRule,
+    RecurringScheduler,
+    Transaction,
+    analytics_between,
+    analytics_from_transactions,
+    build_search,
+    classify_delta,
+    compute_analytics,
+    fmt_amount,
+    format_ts,
+    import_file,
+    make_transaction,
+    parse_amount,
+    parse_ts,
+    range_bounds,
+    round_cents,
+    read_rate_records,
+    write_csv,
+)
+
+# matplotlib فقط وقتی لازم شود import می‌شود (شروع سریع‌تر)
+Figure = FigureCanvasTkAgg = Wedge = None
+
+
+def load_matplotlib():
+    # نمودارها؛ اولین بار که تب Analytics باز می‌شود
+    global Figure, FigureCanvasTkAgg, Wedge
+    if Figure is None:
+        from matplotlib.figure import Figure as _Figure
+        from matplotlib.patches import Wedge as _Wedge
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg as _Canvas
+
+        Wedge, FigureCanvasTkAgg, Figure = _Wedge, _Canvas, _Figure
+
+
+STARTUP_MARKS = [("start", _T0)]
+
+
+def mark_startup(name):
+    STARTUP_MARKS.append((name, time.perf_counter()))
+
+
+def report_startup(target):
+    # WALLET_TIMING=1 روی stderr، در غیر این صورت یک خط JSON به فایل اضافه می‌شود
+    report = {name: round((t - _T0) * 1000, 1) for name, t in STARTUP_MARKS[1:]}
+    line = json.dumps(report)
+    if target == "1":
+        print(f"startup (ms): {line}", file=sys.stderr)
+    else:
+        with open(target, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
 
-# نمودارها
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 APP_TITLE = "Personal Wallet - Advanced Version"
-CURRENCY = "$"
+UNDO_LIMIT = 100  # تعداد عملیات قابل بازگشت
+PAGE_ROWS = 200  # ردیف‌هایی که جدول مجازی در هر بار از دیتابیس می‌خواند
+PREWARM_DELAY_MS = 1500  # پس از نمایش پنجره، matplotlib در پس‌زمینه import می‌شود
+SEARCH_DELAY_MS = 250  # فیلتر پس از توقف تایپ اعمال می‌شود
+MONTH_CHECK_MS = 60_000  # بررسی تغییر ماه برای بودجه
+REDRAW_DELAY_MS = 150  # تغییرات پشت‌سرهم در این بازه در یک رسم ادغام می‌شوند
+POLL_MS = 40  # بررسی صف نتایج نخ تحلیل
+
+
+# ---------------------- Virtual Table ----------------------
+# فقط ردیف‌های قابل مشاهده در Treeview ساخته می‌شوند؛ بقیه صفحه‌به‌صفحه از منبع داده
+class VirtualTable(ttk.Frame):
+    def __init__(self, master, columns, widths, fetch, count, format_row):
+        super().__init__(master)
+        self.fetch = fetch  # fetch(offset, limit) -> rows
+        self.count = count  # count() -> int
+        self.format_row = format_row  # format_row(row) -> (iid, values, tags)
+        self.offset = 0
+        self.visible = 10
+        self.total = 0
+        self._page_start = None
+        self._page = []
+        self._visible = {}  # iid -> row
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=10)
+        for c, w in zip(columns, widths):
+            self.tree.heading(c, text=c)
+            self.tree.column(c, width=w, anchor="w")
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.vsb.grid(row=0, column=1, sticky="ns")
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
 
-CATEGORY_MAP = {
-    "income": ["Salary", "Bonus", "Investment", "Gift", "Other"],
-    "expense": [
-        "Food",
-        "Bills",
-        "Rent",
-        "Transportation",
-        "Healthcare",
-        "Shopping",
-        "Entertainment",
-        "Education",
-        "Travel",
-        "Other",
-    ],
-}
-ALL_CATEGORIES = sorted(set(CATEGORY_MAP["income"] + CATEGORY_MAP["expense"]))
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-self.visible))
+        self.tree.bind("<Next>", lambda e: self.scroll(self.visible))
 
+    def _row_height(self):
+        style = ttk.Style(self)
+        return int(style.lookup("Treeview", "rowheight") or 20)
+
+    def _on_resize(self, event):
+        # ارتفاع هدر تقریباً برابر یک ردیف است
+        rows = max(1, event.height // self._row_height() - 1)
+        if rows != self.visible:
+            self.visible = rows
+            self._render()
+
+    def _on_wheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * self.total)
+        elif args[0] == "scroll":
+            step = self.visible if args[2] == "pages" else 1
+            self.offset += int(args[1]) * step
+        self._render()
+
+    def scroll(self, rows):
+        self.offset += rows
+        self._render()
+
+    def refresh(self):
+        # داده تغییر کرده: کش صفحه باطل می‌شود
+        self.total = self.count()
+        self._page_start = None
+        self._render()
+
+    def _rows(self, start, n):
+        cached = (
+            self._page_start is not None
+            and self._page_start <= start
+            and start + n <= self._page_start + len(self._page)
+        )
+        if not cached:
+            # صفحه حول پنجرهٔ فعلی خوانده می‌شود تا اسکرول در هر دو جهت از کش باشد
+            size = max(PAGE_ROWS, n)
+            self._page_start = max(0, start - (size - n) // 2)
+            self._page = self.fetch(self._page_start, size)
+        i = start - self._page_start
+        return self._page[i : i + n]
+
+    def row(self, iid):
+        return self._visible.get(iid)
+
+    def selected_rows(self):
+        return [self._visible[i] for i in self.tree.selection() if i in self._visible]
+
+    def _render(self):
+        self.offset = max(0, min(self.offset, self.total - self.visible))
+        rows = self._rows(self.offset, self.visible) if self.total else []
+        selected = self.tree.selection()
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        self._visible = {}
+        for row in rows:
+            iid, values, tags = self.format_row(row)
+            self.tree.insert("", "end", iid=iid, values=values, tags=tags)
+            self._visible[iid] = row
+        keep = [i for i in selected if i in self._visible]
+        if keep:
+            self.tree.selection_set(keep)
+        if self.total:
+            first = self.offset / self.total
+            last = min(1.0, (self.offset + self.visible) / self.total)
+            self.vsb.set(first, last)
+        else:
+            self.vsb.set(0, 1)
 
-def fmt_amount(amount: Decimal) -> str:
-    sign = "+" if amount >= 0 else "-"
-    return f"{sign}{CURRENCY}{abs(amount):,.2f}"
 
+# ---------------------- Export Dialog ----------------------
+class ExportDialog(tk.Toplevel):
+    def __init__(self, master, store, path, total):
+        super().__init__(master)
+        self.title("Exporting")
+        self.resizable(False, False)
+        self.transient(master.winfo_toplevel())
+        self.total = total
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+
+        body = ttk.Frame(self, padding=12)
+        body.pack(fill="both", expand=True)
+        self.status_var = tk.StringVar(value=f"0 / {total:,}")
+        ttk.Label(body, text=os.path.basename(path)).pack(anchor="w")
+        self.progress = ttk.Progressbar(
+            body, orient="horizontal", length=320, mode="determinate", maximum=total
+        )
+        self.progress.pack(fill="x", pady=8)
+        ttk.Label(body, textvariable=self.status_var).pack(anchor="w")
+        self.cancel_btn = ttk.Button(body, text="Cancel", command=self._cancel)
+        self.cancel_btn.pack(anchor="e", pady=(8, 0))
+        self.protocol("WM_DELETE_WINDOW", self._cancel)
+
+        self.worker = threading.Thread(
+            target=self._run, args=(store, path), daemon=True
+        )
+        self.worker.start()
+        self.after(100, self._poll)
+
+    def _run(self, store, path):
+        # روی thread جدا؛ فقط از طریق صف با Tk ارتباط دارد
+        try:
+            result = write_csv(
+                store,
+                path,
+                progress=lambda n: self.events.put(("progress", n)),
+                cancel=self.cancel_event,
+            )
+            self.events.put(("cancelled",) if result is None else ("done", result))
+        except Exception as e:
+            self.events.put(("error", e))
 
-def parse_amount(text: str) -> Decimal:
-    clean = text.strip().replace(CURRENCY, "").replace(",", "")
-    if clean.endswith("-"):
-        clean = "-" + clean[:-1]
-    return Decimal(clean)
+    def _cancel(self):
+        self.cancel_event.set()
+        self.cancel_btn.state(["disabled"])
+        self.status_var.set("Cancelling...")
 
+    def _poll(self):
+        try:
+            while True:
+                event = self.events.get_nowait()
+                if event[0] == "progress":
+                    self.progress["value"] = event[1]
+                    self.status_var.set(f"{event[1]:,} / {self.total:,}")
+                    continue
+                self.destroy()
+                if event[0] == "done":
+                    messagebox.showinfo("Exported", "CSV با موفقیت ذخیره شد.")
+                elif event[0] == "error":
+                    messagebox.showerror(
+                        "Error", f"در ذخیره فایل مشکلی پیش آمد:\n{event[1]}"
+                    )
+                return
+        except queue.Empty:
+            pass
+        self.after(100, self._poll)
 
-def month_key(dt_str: str) -> str:
-    return datetime.strptime(dt_str, "%Y-%m-%d %H:%M").strftime("%Y-%m")
+
+# ---------------------- Edit Dialog ----------------------
+class EditDialog(tk.Toplevel):
+    def __init__(self, master, tr, on_save, fx):
+        super().__init__(master)
+        self.title(f"Edit Transaction #{tr.id}")
+        self.resizable(False, False)
+        self.transient(master.winfo_toplevel())
+        self.tr = tr
+        self.on_save = on_save
+        self.fx = fx
+
+        body = ttk.Frame(self, padding=12)
+        body.pack(fill="both", expand=True)
+        body.columnconfigure(1, weight=1)
+
+        ttk.Label(body, text=f"Amount ({tr.currency}):").grid(
+            row=0, column=0, sticky="w"
+        )
+        self.amount_var = tk.StringVar(value=f"{tr.orig_amount}")
+        amount_entry = ttk.Entry(body, textvariable=self.amount_var)
+        amount_entry.grid(row=0, column=1, sticky="ew", pady=2)
+
+        ttk.Label(body, text="Category:").grid(row=1, column=0, sticky="w")
+        self.category_var = tk.StringVar(value=tr.category)
+        ttk.Combobox(
+            body,
+            textvariable=self.category_var,
+            values=ALL_CATEGORIES,
+            state="readonly",
+        ).grid(row=1, column=1, sticky="ew", pady=2)
+
+        ttk.Label(body, text="Description:").grid(row=2, column=0, sticky="w")
+        self.desc_var = tk.StringVar(value=tr.description)
+        ttk.Entry(body, textvariable=self.desc_var, width=36).grid(
+            row=2, column=1, sticky="ew", pady=2
+        )
+
+        btns = ttk.Frame(body)
+        btns.grid(row=3, column=0, columnspan=2, sticky="e", pady=(10, 0))
+        ttk.Button(btns, text="Save", command=self._save).pack(side="left", padx=6)
+        ttk.Button(btns, text="Cancel", command=self.destroy).pack(side="left")
+        self.bind("<Return>", lambda e: self._save())
+        self.bind("<Escape>", lambda e: self.destroy())
+        amount_entry.focus_set()
+        self.grab_set()
+
+    def _save(self):
+        tr = self.tr
+        try:
+            orig = round_cents(parse_amount(self.amount_var.get()))
+        except ValueError:
+            messagebox.showerror(
+                "Invalid Amount",
+                "لطفاً مبلغ را به‌صورت عددی صحیح وارد کنید.",
+                parent=self,
+            )
+            return
+        try:
+            amount = self.fx.to_base(orig, tr.currency, tr.date)
+        except ValueError as e:
+            messagebox.showerror("Exchange Rate", str(e), parent=self)
+            return
+        new = Transaction(
+            amount,
+            self.category_var.get(),
+            self.desc_var.get().strip(),
+            tr.ts,
+            tr.id,
+            tr.account,
+            tr.currency,
+            orig,
+        )
+        self.destroy()
+        self.on_save(self.tr, new)
+
+
+# ---------------------- Accounts Dialog ----------------------
+class AccountsDialog(tk.Toplevel):
+    def __init__(self, master, store, fx, on_add_account, on_load_rates):
+        super().__init__(master)
+        self.title("Accounts")
+        self.transient(master.winfo_toplevel())
+        self.store = store
+        self.fx = fx
+        self.on_add_account = on_add_account
+        self.on_load_rates = on_load_rates
+
+        body = ttk.Frame(self, padding=12)
+        body.pack(fill="both", expand=True)
+        body.columnconfigure(0, weight=1)
+
+        cols = ("Account", "Currency", "Balance", f"In {BASE_CURRENCY}")
+        self.tree = ttk.Treeview(body, columns=cols, show="headings", height=6)
+        for c, w in zip(cols, (140, 80, 130, 130)):
+            self.tree.heading(c, text=c)
+            self.tree.column(c, width=w, anchor="w" if c == "Account" else "e")
+        self.tree.grid(row=0, column=0, columnspan=5, sticky="nsew")
+        self.total_var = tk.StringVar()
+        ttk.Label(body, textvariable=self.total_var).grid(
+            row=1, column=0, columnspan=5, sticky="w", pady=(6, 10)
+        )
+
+        ttk.Label(body, text="Name:").grid(row=2, column=0, sticky="w")
+        self.name_var = tk.StringVar()
+        ttk.Entry(body, textvariable=self.name_var, width=18).grid(
+            row=2, column=1, padx=6
+        )
+        self.currency_var = tk.StringVar(value=BASE_CURRENCY)
+        ttk.Combobox(
+            body,
+            textvariable=self.currency_var,
+            values=sorted(set(CURRENCY_SYMBOLS) | set(fx.currencies())),
+            width=8,
+        ).grid(row=2, column=2, padx=(0, 6))
+        ttk.Button(body, text="Add Account", command=self._add).grid(row=2, column=3)
+        ttk.Button(body, text="Load FX Rates...", command=self._load_rates).grid(
+            row=2, column=4, padx=(6, 0)
+        )
+        self.refresh()
+
+    def refresh(self):
+        self.tree.delete(*self.tree.get_children())
+        # هر گروه (حساب، ارز) یک ردیف؛ ردیف‌های قدیمی با ارزی غیر از ارز حساب
+        # هم جدا نشان داده می‌شوند تا در جمع کل گم نشوند
+        totals = {
+            (r["account"], r["currency"]): r for r in self.store.account_balances()
+        }
+        accounts = self.store.accounts()
+        pairs = list(accounts.items())
+        pairs += [key for key in totals if accounts.get(key[0]) != key[1]]
+        portfolio = Money()
+        for name, currency in pairs:
+            r = totals.get((name, currency))
+            orig = Money(r["orig"]) if r else Money()
+            base = Money(r["base"]) if r else Money()
+            portfolio += base
+            self.tree.insert(
+                "",
+                "end",
+                values=(
+                    name,
+                    currency,
+                    fmt_amount(orig, currency),
+                    fmt_amount(base),
+                ),
+            )
+        self.total_var.set(f"Portfolio total: {fmt_amount(portfolio)}")
+
+    def _add(self):
+        name = self.name_var.get().strip()
+        currency = self.currency_var.get().strip().upper()
+        if not name or len(currency) != 3 or not currency.isalpha():
+            messagebox.showerror(
+                "Invalid Account",
+                "نام حساب و کد سه‌حرفی ارز را وارد کنید.",
+                parent=self,
+            )
+            return
+        try:
+            self.store.add_account(name, currency)
+        except sqlite3.IntegrityError:
+            messagebox.showerror("Invalid Account", "این حساب وجود دارد.", parent=self)
+            return
+        self.name_var.set("")
+        self.on_add_account()
+        self.refresh()
+
+    def _load_rates(self):
+        path = filedialog.askopenfilename(
+            parent=self, filetypes=[("CSV", "*.csv"), ("All files", "*.*")]
+        )
+        if path:
+            self.on_load_rates(path)
+            self.refresh()
+
+
+# ---------------------- Recurring Dialog ----------------------
+class RecurringDialog(tk.Toplevel):
+    FREQS = {"Monthly": MONTHLY, "Weekly": WEEKLY}
+
+    def __init__(self, master, scheduler, accounts, on_add):
+        super().__init__(master)
+        self.title("Recurring Transactions")
+        self.transient(master.winfo_toplevel())
+        self.scheduler = scheduler
+        self.accounts = accounts
+        self.on_add = on_add
+
+        body = ttk.Frame(self, padding=12)
+        body.pack(fill="both", expand=True)
+        body.columnconfigure(1, weight=1)
+
+        cols = ("Every", "Amount", "Category", "Description", "Account", "Next Due")
+        self.tree = ttk.Treeview(body, columns=cols, show="headings", height=6)
+        for c, w in zip(cols, (90, 110, 110, 150, 100, 130)):
+            self.tree.heading(c, text=c)
+            self.tree.column(c, width=w, anchor="e" if c == "Amount" else "w")
+        self.tree.grid(row=0, column=0, columnspan=4, sticky="nsew", pady=(0, 10))
+
+        self.amount_var = tk.StringVar()
+        self.type_var = tk.StringVar(value="Expense")
+        self.category_var = tk.StringVar(value=ALL_CATEGORIES[0])
+        self.desc_var = tk.StringVar()
+        self.account_var = tk.StringVar(value=DEFAULT_ACCOUNT)
+        self.freq_var = tk.StringVar(value="Monthly")
+        self.start_var = tk.StringVar(value=datetime.now().strftime(DATE_FMT))
+
+        fields = [
+            ("Amount:", ttk.Entry(body, textvariable=self.amount_var)),
+            (
+                "Type:",
+                ttk.Combobox(
+                    body,
+                    textvariable=self.type_var,
+                    values=["Expense", "Income"],
+                    state="readonly",
+                ),
+            ),
+            (
+                "Category:",
+                ttk.Combobox(
+                    body,
+                    textvariable=self.category_var,
+                    values=ALL_CATEGORIES,
+                    state="readonly",
+                ),
+            ),
+            ("Description:", ttk.Entry(body, textvariable=self.desc_var)),
+            (
+                "Account:",
+                ttk.Combobox(
+                    body,
+                    textvariable=self.account_var,
+                    values=list(accounts),
+                    state="readonly",
+                ),
+            ),
+            (
+                "Frequency:",
+                ttk.Combobox(
+                    body,
+                    textvariable=self.freq_var,
+                    values=list(self.FREQS),
+                    state="readonly",
+                ),
+            ),
+            (f"Start ({DATE_FMT}):", ttk.Entry(body, textvariable=self.start_var)),
+        ]
+        for i, (label, widget) in enumerate(fields, start=1):
+            ttk.Label(body, text=label).grid(row=i, column=0, sticky="w", pady=3)
+            widget.grid(row=i, column=1, columnspan=3, sticky="ew", pady=3)
+
+        btns = ttk.Frame(body)
+        btns.grid(row=len(fields) + 1, column=0, columnspan=4, sticky="e", pady=(10, 0))
+        ttk.Button(btns, text="Add Rule", command=self._add).pack(side="left")
+        ttk.Button(btns, text="Delete Selected", command=self._delete).pack(
+            side="left", padx=(6, 0)
+        )
+        self.refresh()
+
+    def refresh(self):
+        self.tree.delete(*self.tree.get_children())
+        for rule in self.scheduler.rules.values():
+            unit = "month" if rule.freq == MONTHLY else "week"
+            every = f"{rule.every} {unit}s" if rule.every > 1 else unit
+            if rule.finished:
+                due = "finished"
+            elif rule.id in self.scheduler.blocked:
+                due = f"{format_ts(rule.next_ts)} (no rate)"
+            else:
+                due = format_ts(rule.next_ts)
+            self.tree.insert(
+                "",
+                "end",
+                iid=str(rule.id),
+                values=(
+                    f"every {every}",
+                    fmt_amount(rule.amount, rule.currency),
+                    rule.category,
+                    rule.description,
+                    rule.account,
+                    due,
+                ),
+            )
+
+    def _add(self):
+        try:
+            amount = round_cents(parse_amount(self.amount_var.get()))
+            start = parse_ts(self.start_var.get().strip())
+        except ValueError:
+            messagebox.showerror(
+                "Invalid Rule",
+                f"مبلغ را به‌صورت عددی و تاریخ شروع را به‌صورت {DATE_FMT} وارد کنید.",
+                parent=self,
+            )
+            return
+        if not amount:
+            messagebox.showerror(
+                "Invalid Rule", "مبلغ نمی‌تواند صفر باشد.", parent=self
+            )
+            return
+        amount = abs(amount) if self.type_var.get() == "Income" else -abs(amount)
+        account = self.account_var.get()
+        rule = RecurringRule(
+            amount,
+            self.category_var.get(),
+            self.desc_var.get().strip(),
+            account,
+            self.accounts.get(account, BASE_CURRENCY),
+            self.FREQS[self.freq_var.get()],
+            start,
+        )
+        self.on_add(rule)
+        self.amount_var.set("")
+        self.desc_var.set("")
+        self.refresh()
+
+    def _delete(self):
+        for iid in self.tree.selection():
+            self.scheduler.remove(int(iid))
+        self.refresh()
 
 
 # ---------------------- Transactions Tab ----------------------
 class TransactionsUI(ttk.Frame):
-    def __init__(self, master, on_change=None):
+    def __init__(self, master, store, bus=None, fx=None):
         super().__init__(master, padding=12)
-        self.on_change = on_change
-        self.transactions = []
+        self.bus = bus
+        self.store = store
+        self.fx = fx or FxRates(store)
+        self.accounts = store.accounts()  # name -> currency
+        self.recurring = RecurringScheduler(store, self.fx)
+        self.aggregates = LedgerAggregates.from_store(store)
+        # هر مورد (removed, added)؛ undo برعکس آن را اعمال می‌کند
+        self._undo = deque(maxlen=UNDO_LIMIT)
+        self.search = None  # (where, params) فیلتر فعلی جدول
+        self._search_job = None
         self._build_ui()
+        self.table.refresh()
         self._refresh_balance()
+        self.after(MONTH_CHECK_MS, self._check_recurring)
 
     def _build_ui(self):
         self.columnconfigure(0, weight=1)
@@ -71,14 +637,23 @@ class TransactionsUI(ttk.Frame):
         balance_lbl.configure(font=("Segoe UI", 16, "bold"))
         balance_lbl.grid(row=0, column=0, sticky="w")
 
+        ttk.Button(header, text="Accounts...", command=self._open_accounts).grid(
+            row=0, column=1, padx=(8, 0)
+        )
+        ttk.Button(header, text="Recurring...", command=self._open_recurring).grid(
+            row=0, column=2, padx=(8, 0)
+        )
+        ttk.Button(header, text="Import...", command=self._import_file).grid(
+            row=0, column=3, padx=(8, 0)
+        )
         ttk.Button(header, text="Export CSV", command=self._export_csv).grid(
-            row=0, column=1, padx=8
+            row=0, column=4, padx=8
         )
 
         # Add Transaction form (بدون Type)
         form = ttk.LabelFrame(self, text="Add Transaction", padding=10)
         form.grid(row=1, column=0, sticky="ew", pady=(10, 8))
-        for i in range(6):
+        for i in range(8):
             form.columnconfigure(i, weight=1)
 
         ttk.Label(form, text="Amount:").grid(row=0, column=0, sticky="w")
@@ -103,8 +678,18 @@ class TransactionsUI(ttk.Frame):
         self.desc_entry = ttk.Entry(form, textvariable=self.desc_var)
         self.desc_entry.grid(row=0, column=5, sticky="ew")
 
+        ttk.Label(form, text="Account:").grid(row=0, column=6, sticky="w")
+        self.account_var = tk.StringVar(value=DEFAULT_ACCOUNT)
+        self.account_combo = ttk.Combobox(
+            form,
+            textvariable=self.account_var,
+            values=list(self.accounts),
+            state="readonly",
+        )
+        self.account_combo.grid(row=0, column=7, sticky="ew")
+
         btns = ttk.Frame(form)
-        btns.grid(row=1, column=0, columnspan=6, sticky="w", pady=(10, 0))
+        btns.grid(row=1, column=0, columnspan=8, sticky="w", pady=(10, 0))
         ttk.Button(
             btns, text="Add Income", command=lambda: self._add_transaction("income")
         ).pack(side="left", padx=(0, 6))
@@ -118,20 +703,50 @@ class TransactionsUI(ttk.Frame):
         history.grid(row=2, column=0, sticky="nsew", pady=(8, 0))
         self.rowconfigure(2, weight=1)
 
-        cols = ("#", "Amount", "Type", "Category", "Description", "Date")
-        self.tree = ttk.Treeview(history, columns=cols, show="headings", height=10)
-        for c, w in zip(cols, (50, 120, 90, 140, 260, 150)):
-            self.tree.heading(c, text=c)
-            self.tree.column(c, width=w, anchor="w")
+        search_bar = ttk.Frame(history)
+        search_bar.grid(row=0, column=0, sticky="ew", pady=(0, 8))
+        search_bar.columnconfigure(1, weight=1)
+        ttk.Label(search_bar, text="Search:").grid(row=0, column=0, sticky="w")
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_bar, textvariable=self.search_var)
+        search_entry.grid(row=0, column=1, sticky="ew", padx=6)
+        search_entry.bind("<KeyRelease>", lambda e: self._schedule_search())
+        ttk.Button(search_bar, text="Clear", command=self._clear_search).grid(
+            row=0, column=2
+        )
+        self.matches_var = tk.StringVar()
+        ttk.Label(search_bar, textvariable=self.matches_var).grid(
+            row=0, column=3, padx=(8, 0)
+        )
+
+        cols = ("#", "Amount", "Type", "Category", "Description", "Date", "Account")
+        self.table = VirtualTable(
+            history,
+            cols,
+            (50, 120, 90, 140, 240, 150, 110),
+            fetch=lambda offset, limit: self.store.page(offset, limit, self.search),
+            count=self._count_rows,
+            format_row=self._format_row,
+        )
+        self.tree = self.table.tree
         self.tree.column("Amount", anchor="e")
         self.tree.column("#", anchor="center")
-
-        vsb = ttk.Scrollbar(history, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=vsb.set)
-        self.tree.grid(row=0, column=0, sticky="nsew")
-        vsb.grid(row=0, column=1, sticky="ns")
+        self.table.grid(row=1, column=0, sticky="nsew")
         history.columnconfigure(0, weight=1)
-        history.rowconfigure(0, weight=1)
+        history.rowconfigure(1, weight=1)
+
+        actions = ttk.Frame(history)
+        actions.grid(row=2, column=0, sticky="w", pady=(8, 0))
+        ttk.Button(actions, text="Edit Selected", command=self._edit_selected).pack(
+            side="left", padx=(0, 6)
+        )
+        ttk.Button(actions, text="Delete Selected", command=self._delete_selected).pack(
+            side="left", padx=(0, 6)
+        )
+        ttk.Button(actions, text="Undo", command=self._undo_last).pack(side="left")
+        self.tree.bind("<Double-1>", lambda e: self._edit_selected())
+        self.tree.bind("<Delete>", lambda e: self._delete_selected())
+        self.bind_all("<Control-z>", lambda e: self._undo_last())
 
         style = ttk.Style(self)
         if "clam" in style.theme_names():
@@ -144,6 +759,30 @@ class TransactionsUI(ttk.Frame):
         self.tree.tag_configure("income", foreground="#16803c")
         self.tree.tag_configure("expense", foreground="#a11717")
 
+    def _count_rows(self):
+        if self.search is None:
+            return self.aggregates.count
+        n = self.store.count(self.search)
+        self.matches_var.set(f"{n:,} matches")
+        return n
+
+    def _schedule_search(self):
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(SEARCH_DELAY_MS, self._apply_search)
+
+    def _apply_search(self):
+        self._search_job = None
+        self.search = build_search(self.search_var.get(), has_fts=self.store.has_fts)
+        if self.search is None:
+            self.matches_var.set("")
+        self.table.offset = 0
+        self.table.refresh()
+
+    def _clear_search(self):
+        self.search_var.set("")
+        self._apply_search()
+
     # فقط ورودی‌ها
     def _reset_inputs(self):
         try:
@@ -159,7 +798,7 @@ class TransactionsUI(ttk.Frame):
 
     # پاک‌کردن همه تراکنش‌ها + فرم
     def _clear_form(self):
-        if not self.transactions:
+        if not self.aggregates.count:
             self._reset_inputs()
             return
         ok = messagebox.askyesno(
@@ -167,111 +806,401 @@ class TransactionsUI(ttk.Frame):
         )
         if not ok:
             return
-        self.transactions.clear()
-        for iid in self.tree.get_children():
-            self.tree.delete(iid)
+        self.store.clear()
+        self.aggregates.clear()
+        self._undo.clear()
+        self.table.refresh()
         self._refresh_balance()
         self._reset_inputs()
-        if self.on_change:
-            self.on_change(self.transactions)
+        self._notify(TX_CLEARED)
 
     def _add_transaction(self, force_type: str):
         try:
-            amount = parse_amount(self.amount_var.get())
-        except (InvalidOperation, ValueError):
+            amount = round_cents(parse_amount(self.amount_var.get()))
+        except ValueError:
             messagebox.showerror(
                 "Invalid Amount", "لطفاً مبلغ را به‌صورت عددی صحیح وارد کنید."
             )
             return
-        if force_type == "expense" and amount > 0:
-            amount = -amount
-        if force_type == "income" and amount < 0:
-            amount = -amount
-
-        data = {
-            "id": len(self.transactions) + 1,
-            "amount": amount,
-            "type": "Income" if amount >= 0 else "Expense",
-            "category": self.category_var.get(),
-            "description": self.desc_var.get().strip(),
-            "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
-        }
-        self.transactions.append(data)
-        self._insert_row(data)
-        self._refresh_balance()
+        if force_type == "expense":
+            amount = -abs(amount)
+        if force_type == "income":
+            amount = abs(amount)
+        orig = amount
+
+        account = self.account_var.get()
+        currency = self.accounts.get(account, BASE_CURRENCY)
+        dt_str = datetime.now().strftime(DATE_FMT)
+        try:
+            amount = self.fx.to_base(orig, currency, dt_str)
+        except ValueError:
+            messagebox.showerror(
+                "Exchange Rate",
+                f"نرخ تبدیل {currency} وجود ندارد؛ ابتدا نرخ‌ها را وارد کنید.",
+            )
+            return
+        data = make_transaction(
+            amount,
+            self.category_var.get(),
+            self.desc_var.get().strip(),
+            dt_str,
+            account=account,
+            currency=currency,
+            orig_amount=orig,
+        )
+        self._add_rows([data])
         self._reset_inputs()
-        if self.on_change:
-            self.on_change(self.transactions)
-
-    def _insert_row(self, tr):
-        tag = "income" if tr["amount"] >= 0 else "expense"
-        self.tree.insert(
-            "",
-            0,
-            values=(
-                tr["id"],
-                fmt_amount(tr["amount"]),
-                tr["type"],
-                tr["category"],
-                tr["description"],
-                tr["date"],
-            ),
-            tags=(tag,),
+
+    def _add_rows(self, rows, undoable=True):
+        self.store.add_many(rows)
+        self._apply([], rows, undoable)
+
+    def _apply(self, removed, added, undoable=True):
+        # تغییر در دیتابیس انجام شده؛ اینجا فقط جمع‌ها و نما به‌روز می‌شوند
+        for tr in removed:
+            self.aggregates.remove(tr)
+        for tr in added:
+            self.aggregates.add(tr)
+        if undoable:
+            self._undo.append((list(removed), list(added)))
+        self.table.refresh()
+        self._refresh_balance()
+        self._notify(classify_delta(removed, added), removed, added)
+
+    def _delete_selected(self):
+        rows = self.table.selected_rows()
+        if not rows:
+            return
+        self.store.replace(delete_ids=[t.id for t in rows])
+        self._apply(rows, [])
+
+    def _edit_selected(self):
+        rows = self.table.selected_rows()
+        if len(rows) == 1:
+            EditDialog(self, rows[0], self._save_edit, self.fx)
+
+    def _save_edit(self, old, new):
+        self.store.update(new)
+        self._apply([old], [new])
+
+    def _undo_last(self):
+        if not self._undo:
+            return
+        removed, added = self._undo.pop()
+        self.store.replace(delete_ids=[t.id for t in added], restore=removed)
+        self._apply(added, removed, undoable=False)
+
+    def _notify(self, kind, removed=(), added=()):
+        if self.bus is not None:
+            self.bus.publish(kind, removed, added, self.aggregates)
+
+    @staticmethod
+    def _format_row(tr):
+        tag = "income" if tr.amount >= 0 else "expense"
+        values = (
+            tr.id,
+            fmt_amount(tr.orig_amount, tr.currency),
+            tr.type,
+            tr.category,
+            tr.description,
+            tr.date,
+            tr.account,
         )
+        return str(tr.id), values, (tag,)
 
     def _refresh_balance(self):
-        total = (
-            sum(t["amount"] for t in self.transactions)
-            if self.transactions
-            else Decimal("0")
-        )
+        total = self.aggregates.balance
         self.balance_var.set(f"Current Balance: {CURRENCY}{total:,.2f}")
 
+    def _open_accounts(self):
+        AccountsDialog(
+            self, self.store, self.fx, self._reload_accounts, self._load_rates
+        )
+
+    def _open_recurring(self):
+        RecurringDialog(self, self.recurring, self.accounts, self._add_rule)
+
+    def _add_rule(self, rule):
+        self.recurring.add(rule)
+        self.materialize_recurring()
+
+    def materialize_recurring(self):
+        # همهٔ سررسیدهای عقب‌افتاده با یک insert و یک به‌روزرسانی نما
+        try:
+            rows, skipped = self.recurring.materialize()
+        except Exception as e:
+            messagebox.showerror("Error", f"ثبت تراکنش‌های تکراری انجام نشد:\n{e}")
+            return
+        if rows:
+            self._apply([], rows, undoable=False)
+        if skipped:
+            # هر قاعده فقط یک بار؛ تا ورود نرخ‌های تازه دوباره بررسی نمی‌شود
+            names = "\n".join(
+                f"• {r.description or r.category} ({r.currency})" for r in skipped
+            )
+            messagebox.showwarning(
+                "Exchange Rate",
+                "برای این تراکنش‌های تکراری نرخ تبدیل وجود ندارد؛"
+                f" پس از وارد کردن نرخ‌ها ثبت می‌شوند:\n{names}",
+            )
+
+    def _check_recurring(self):
+        # فقط سررسید نزدیک‌ترین قاعده بررسی می‌شود (شامل تغییر ماه)
+        due = self.recurring.next_due()
+        if due is not None and due <= parse_ts(datetime.now().strftime(DATE_FMT)):
+            self.materialize_recurring()
+        self.after(MONTH_CHECK_MS, self._check_recurring)
+
+    def _reload_accounts(self):
+        self.accounts = self.store.accounts()
+        self.account_combo["values"] = list(self.accounts)
+
+    def _load_rates(self, path):
+        # فقط ردیف‌های ارزهای تغییرکرده دوباره به ارز پایه تبدیل می‌شوند
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                currencies = self.fx.set_rates(read_rate_records(f))
+            updated = sum(self.store.rebase(c, self.fx) for c in currencies)
+        except Exception as e:
+            messagebox.showerror("Error", f"در خواندن نرخ‌ها مشکلی پیش آمد:\n{e}")
+            return
+        if updated:
+            self.aggregates = LedgerAggregates.from_store(self.store)
+            self._undo.clear()
+            self.table.refresh()
+            self._refresh_balance()
+            self._notify(TX_RELOADED)
+        messagebox.showinfo(
+            "Exchange Rates",
+            f"Currencies: {', '.join(sorted(currencies)) or '-'}\n"
+            f"Transactions re-valued: {updated:,}",
+        )
+        self.recurring.retry()
+        self.materialize_recurring()
+
+    def _import_file(self):
+        path = filedialog.askopenfilename(
+            filetypes=[
+                ("CSV / OFX", "*.csv *.csv.gz *.ofx *.qfx"),
+                ("All files", "*.*"),
+            ]
+        )
+        if not path:
+            return
+
+        def add_batch(rows):
+            for tr in rows:
+                self.aggregates.add(tr)
+            self._notify(TX_ADDED, added=rows)
+
+        self.configure(cursor="watch")
+        self.update_idletasks()
+        try:
+            imported, duplicates, invalid = import_file(
+                self.store, path, on_batch=add_batch, fx=self.fx
+            )
+        except Exception as e:
+            # دیتابیس rollback شده؛ جمع‌ها دوباره از دیتابیس ساخته می‌شوند
+            self.aggregates = LedgerAggregates.from_store(self.store)
+            self._notify(TX_RELOADED)
+            messagebox.showerror("Error", f"در خواندن فایل مشکلی پیش آمد:\n{e}")
+            return
+        finally:
+            self._reload_accounts()
+            self.configure(cursor="")
+            self.table.refresh()
+            self._refresh_balance()
+        messagebox.showinfo(
+            "Imported",
+            f"Imported: {imported:,}\nDuplicates skipped: {duplicates:,}\n"
+            f"Invalid rows: {invalid:,}",
+        )
+
     def _export_csv(self):
-        if not self.transactions:
+        if not self.aggregates.count:
             messagebox.showinfo("Nothing to export", "هنوز تراکنشی ثبت نشده است.")
             return
         path = filedialog.asksaveasfilename(
             defaultextension=".csv",
-            filetypes=[("CSV", "*.csv")],
+            filetypes=[("CSV", "*.csv"), ("Compressed CSV", "*.csv.gz")],
             initialfile="transactions.csv",
         )
         if not path:
             return
-        try:
-            with open(path, "w", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow(
-                    ["#", "Amount", "Type", "Category", "Description", "Date"]
-                )
-                for t in sorted(self.transactions, key=lambda x: x["id"]):
-                    writer.writerow(
-                        [
-                            t["id"],
-                            f"{t['amount']}",
-                            t["type"],
-                            t["category"],
-                            t["description"],
-                            t["date"],
-                        ]
-                    )
-            messagebox.showinfo("Exported", "CSV با موفقیت ذخیره شد.")
-        except Exception as e:
-            messagebox.showerror("Error", f"در ذخیره فایل مشکلی پیش آمد:\n{e}")
+        ExportDialog(self, self.store, path, self.aggregates.count)
+
+
+# ---------------------- Charts ----------------------
+# آرتیست‌ها یک بار ساخته می‌شوند و فقط داده‌شان عوض می‌شود (animated برای blit)
+class PieChart:
+    START_ANGLE = 140
+
+    def __init__(self, ax):
+        self.ax = ax
+        self.slices = OrderedDict()  # category -> (wedge, label, pct)
+        self._colors = {}
+        ax.set_aspect("equal")
+        ax.set_xlim(-1.45, 1.45)
+        ax.set_ylim(-1.25, 1.25)
+        ax.axis("off")
+        ax.set_title("Expense Distribution by Category")
+        self.empty = ax.text(
+            0, 0, "No expense data", ha="center", va="center", animated=True
+        )
+
+    def _slice(self, cat):
+        if cat not in self.slices:
+            color = self._colors.setdefault(cat, f"C{len(self._colors) % 10}")
+            wedge = Wedge((0, 0), 1, 0, 0, facecolor=color, animated=True)
+            self.ax.add_patch(wedge)
+            label = self.ax.text(0, 0, cat, va="center", animated=True)
+            pct = self.ax.text(0, 0, "", ha="center", va="center", animated=True)
+            self.slices[cat] = (wedge, label, pct)
+        return self.slices[cat]
+
+    def update(self, values):
+        # values: category -> amount؛ همیشه با blit کافی است
+        for cat in [c for c in self.slices if c not in values]:
+            for artist in self.slices.pop(cat):
+                artist.remove()
+        total = float(sum(values.values()))
+        angle = self.START_ANGLE
+        for cat, value in values.items():
+            wedge, label, pct = self._slice(cat)
+            frac = float(value) / total
+            wedge.set_theta1(angle)
+            wedge.set_theta2(angle + 360 * frac)
+            mid = math.radians(angle + 180 * frac)
+            x, y = math.cos(mid), math.sin(mid)
+            label.set_position((1.1 * x, 1.1 * y))
+            label.set_horizontalalignment("left" if x >= 0 else "right")
+            pct.set_position((0.6 * x, 0.6 * y))
+            pct.set_text(f"{100 * frac:.1f}%")
+            angle += 360 * frac
+        self.empty.set_visible(not values)
+        return False
+
+    def artists(self):
+        out = [self.empty]
+        for parts in self.slices.values():
+            out.extend(parts)
+        return out
+
+
+class BarChart:
+    SLOTS = MAX_BUCKETS
+    WIDTH = 0.35
+
+    def __init__(self, ax):
+        self.ax = ax
+        self.labels = []
+        xs = range(self.SLOTS)
+        zeros = [0] * self.SLOTS
+        self.inc_bars = ax.bar(
+            [x - self.WIDTH / 2 for x in xs], zeros, width=self.WIDTH, label="Income"
+        )
+        self.exp_bars = ax.bar(
+            [x + self.WIDTH / 2 for x in xs], zeros, width=self.WIDTH, label="Expense"
+        )
+        for bar in list(self.inc_bars) + list(self.exp_bars):
+            bar.set_animated(True)
+        ax.figure.subplots_adjust(left=0.17, bottom=0.2)
+        ax.set_xlim(-0.5, RECENT_MONTHS - 0.5)
+        ax.set_xticks(range(RECENT_MONTHS))
+        ax.set_xticklabels([""] * RECENT_MONTHS)
+        ax.set_ylabel(f"Amount ({CURRENCY})")
+        self.title = "Income vs Expense (Last 6 Months)"
+        ax.set_title(self.title)
+        ax.legend()
+        self.empty = ax.text(
+            0.5,
+            0.5,
+            "No data",
+            ha="center",
+            va="center",
+            transform=ax.transAxes,
+            animated=True,
+        )
+
+    def update(self, labels, inc_vals, exp_vals, title=None):
+        # True یعنی محورها عوض شده‌اند و رسم کامل لازم است
+        full = False
+        if labels != self.labels:
+            self.labels = labels
+            n = max(len(labels), RECENT_MONTHS)
+            self.ax.set_xlim(-0.5, n - 0.5)
+            self.ax.set_xticks(range(n))
+            self.ax.set_xticklabels(labels + [""] * (n - len(labels)), rotation=45)
+            full = True
+        if title and title != self.title:
+            self.title = title
+            self.ax.set_title(title)
+            full = True
+        for i in range(self.SLOTS):
+            shown = i < len(labels)
+            for bars, vals in ((self.inc_bars, inc_vals), (self.exp_bars, exp_vals)):
+                bars[i].set_visible(shown)
+                bars[i].set_height(vals[i] if shown else 0)
+        peak = max(inc_vals + exp_vals, default=0) or 1
+        top = self.ax.get_ylim()[1]
+        # فقط وقتی میله از محور بیرون بزند یا خیلی کوتاه شود محور عوض می‌شود
+        if peak > top or peak < top * 0.5:
+            self.ax.set_ylim(0, peak * 1.1)
+            full = True
+        self.empty.set_visible(not labels)
+        return full
+
+    def artists(self):
+        return list(self.inc_bars) + list(self.exp_bars) + [self.empty]
 
 
 # ---------------------- Analytics Tab ----------------------
 class AnalyticsUI(ttk.Frame):
-    def __init__(self, master):
+    def __init__(self, master, store=None):
         super().__init__(master, padding=12)
+        self._agg = None
+        self._dirty = False
+        self._redraw_job = None
+        self._poll_job = None
+        self.worker = AnalyticsWorker(store)
+        self.pie_chart = self.bar_chart = None
         self._build_ui()
+        # وقتی تب دیده می‌شود، اگر تغییری مانده یک بار رسم می‌شود
+        self.bind("<Map>", lambda e: self._flush())
+        self.after(PREWARM_DELAY_MS, self._prewarm)
 
     def _build_ui(self):
         self.columnconfigure(0, weight=1)
-        self.rowconfigure(1, weight=1)
+        self.rowconfigure(2, weight=1)
+
+        bar = ttk.Frame(self)
+        bar.grid(row=0, column=0, sticky="ew", pady=(0, 8))
+        ttk.Label(bar, text="Range:").pack(side="left")
+        self.range_var = tk.StringVar(value=RANGES[0])
+        ranges = ttk.Combobox(
+            bar, textvariable=self.range_var, values=RANGES, state="readonly", width=14
+        )
+        ranges.pack(side="left", padx=(6, 12))
+        ranges.bind("<<ComboboxSelected>>", lambda e: self._apply_range())
+        today = date.today()
+        self.from_var = tk.StringVar(value=today.replace(month=1, day=1).isoformat())
+        self.to_var = tk.StringVar(value=today.isoformat())
+        self.custom_widgets = []
+        for text, var in (("From:", self.from_var), ("To:", self.to_var)):
+            label = ttk.Label(bar, text=text)
+            label.pack(side="left")
+            entry = ttk.Entry(bar, textvariable=var, width=11)
+            entry.pack(side="left", padx=(4, 8))
+            entry.bind("<Return>", lambda e: self._apply_range())
+            self.custom_widgets.append(entry)
+        apply_btn = ttk.Button(bar, text="Apply", command=self._apply_range)
+        apply_btn.pack(side="left")
+        self.custom_widgets.append(apply_btn)
+        self.bounds = None
+        self._show_custom(False)
 
         self.stats_box = ttk.LabelFrame(self, text="Financial Statistics", padding=10)
-        self.stats_box.grid(row=0, column=0, sticky="ew")
+        self.stats_box.grid(row=1, column=0, sticky="ew")
         for i in range(3):
             self.stats_box.columnconfigure(i, weight=1)
 
@@ -302,14 +1231,65 @@ class AnalyticsUI(ttk.Frame):
                 ),
             ).pack(side="left")
 
-        charts = ttk.LabelFrame(self, text="Expense Analytics", padding=10)
-        charts.grid(row=1, column=0, sticky="nsew", pady=(10, 0))
-        charts.columnconfigure(0, weight=1)
-        charts.columnconfigure(1, weight=1)
-        charts.rowconfigure(0, weight=1)
+        self.charts = ttk.LabelFrame(self, text="Expense Analytics", padding=10)
+        self.charts.grid(row=2, column=0, sticky="nsew", pady=(10, 0))
+        self.charts.columnconfigure(0, weight=1)
+        self.charts.columnconfigure(1, weight=1)
+        self.charts.rowconfigure(0, weight=1)
+        self.charts_placeholder = ttk.Label(self.charts, text="Loading charts...")
+        self.charts_placeholder.grid(row=0, column=0, columnspan=2)
+
+    def _show_custom(self, shown):
+        for widget in self.custom_widgets:
+            widget.state(["!disabled"] if shown else ["disabled"])
+
+    def _apply_range(self):
+        name = self.range_var.get()
+        self._show_custom(name == "Custom")
+        if name == "Custom":
+            try:
+                first, last = (
+                    datetime.strptime(v.get().strip(), "%Y-%m-%d").date()
+                    for v in (self.from_var, self.to_var)
+                )
+                if first > last:
+                    raise ValueError
+            except ValueError:
+                messagebox.showerror(
+                    "Invalid Range",
+                    "تاریخ‌ها را به‌صورت YYYY-MM-DD و به ترتیب وارد کنید.",
+                )
+                return
+            self.bounds = (
+                first.toordinal() - EPOCH_ORDINAL,
+                last.toordinal() - EPOCH_ORDINAL,
+            )
+        else:
+            self.bounds = range_bounds(name)
+        if self._agg is not None:
+            self._dirty = True
+            self._flush()
+
+    def _chart_title(self):
+        name = self.range_var.get()
+        if self.bounds is None:
+            return "Income vs Expense (Last 6 Months)"
+        if name == "Custom":
+            return f"Income vs Expense ({self.from_var.get()} – {self.to_var.get()})"
+        return f"Income vs Expense ({name})"
+
+    def _prewarm(self):
+        # import روی thread جدا تا پنجره قفل نشود؛ ساخت ویجت‌ها بعداً روی Tk
+        threading.Thread(target=load_matplotlib, daemon=True).start()
+
+    def _build_charts(self):
+        load_matplotlib()
+        charts = self.charts
+        self.charts_placeholder.destroy()
 
         self.fig_left = Figure(figsize=(4.6, 3.4), dpi=100)
         self.ax_pie = self.fig_left.add_subplot(111)
+        self.pie_chart = PieChart(self.ax_pie)
         self.canvas_left = FigureCanvasTkAgg(self.fig_left, master=charts)
         self.canvas_left.get_tk_widget().grid(
             row=0, column=0, sticky="nsew", padx=(0, 10)
@@ -317,98 +1297,116 @@ class AnalyticsUI(ttk.Frame):
 
         self.fig_right = Figure(figsize=(4.6, 3.4), dpi=100)
         self.ax_bar = self.fig_right.add_subplot(111)
+        self.bar_chart = BarChart(self.ax_bar)
         self.canvas_right = FigureCanvasTkAgg(self.fig_right, master=charts)
         self.canvas_right.get_tk_widget().grid(row=0, column=1, sticky="nsew")
 
+        self._backgrounds = {}
+        for canvas, chart in (
+            (self.canvas_left, self.pie_chart),
+            (self.canvas_right, self.bar_chart),
+        ):
+            canvas.mpl_connect(
+                "draw_event", lambda e, chart=chart: self._on_draw(e.canvas, chart)
+            )
+
+    def _on_draw(self, canvas, chart):
+        # بعد از هر رسم کامل: پس‌زمینه ذخیره و آرتیست‌های animated روی آن کشیده می‌شوند
+        fig = canvas.figure
+        self._backgrounds[canvas] = canvas.copy_from_bbox(fig.bbox)
+        for artist in chart.artists():
+            fig.draw_artist(artist)
+
+    def _blit(self, canvas, chart, full):
+        background = self._backgrounds.get(canvas)
+        if full or background is None:
+            canvas.draw()
+            return
+        canvas.restore_region(background)
+        for artist in chart.artists():
+            canvas.figure.draw_artist(artist)
+        canvas.blit(canvas.figure.bbox)
+
     def update_from_transactions(self, transactions):
-        income = sum(t["amount"] for t in transactions if t["amount"] >= 0)
-        expense = -sum(t["amount"] for t in transactions if t["amount"] < 0)
-        net = income - expense
-        count = len(transactions)
-
-        largest_exp = max(
-            [abs(t["amount"]) for t in transactions if t["amount"] < 0],
-            default=Decimal("0"),
-        )
-
-        by_month_exp = defaultdict(Decimal)
-        for t in transactions:
-            ym = month_key(t["date"])
-            if t["amount"] < 0:
-                by_month_exp[ym] += -t["amount"]
-        avg_monthly_exp = (
-            (sum(by_month_exp.values()) / max(1, len(by_month_exp)))
-            if by_month_exp
-            else Decimal("0")
-        )
-
-        self.stat_vars["Total Income"].set(f"{CURRENCY}{income:,.2f}")
-        self.stat_vars["Total Expenses"].set(f"{CURRENCY}{expense:,.2f}")
-        self.stat_vars["Net Savings"].set(f"{CURRENCY}{net:,.2f}")
-        self.stat_vars["Transactions"].set(str(count))
-        self.stat_vars["Avg Monthly Expense"].set(f"{CURRENCY}{avg_monthly_exp:,.2f}")
-        self.stat_vars["Largest Expense"].set(f"{CURRENCY}{largest_exp:,.2f}")
+        # ساخت جمع‌ها از لیست کامل در نخ تحلیل انجام می‌شود
+        self.update_from_aggregates(list(transactions))
+
+    def on_ledger_event(self, event):
+        self.update_from_aggregates(event.aggregates)
+
+    def update_from_aggregates(self, agg):
+        # فقط علامت‌گذاری؛ رسم واقعی با after() و یک بار برای چند تغییر
+        self._agg = agg
+        self._dirty = True
+        if self._redraw_job is None:
+            self._redraw_job = self.after(REDRAW_DELAY_MS, self._on_redraw_timer)
+
+    def _on_redraw_timer(self):
+        self._redraw_job = None
+        self._flush()
+
+    def _flush(self):
+        # تب مخفی رسم نمی‌شود و dirty می‌ماند
+        if not self._dirty or not self.winfo_ismapped():
+            return
+        if self.pie_chart is None:
+            self._build_charts()
+        self._dirty = False
+        self._title = self._chart_title()
+        if isinstance(self._agg, list):
+            self.worker.submit(analytics_from_transactions, self._agg, self.bounds)
+        elif self.bounds is None or self.worker.store is None:
+            # جمع‌های کل افزایشی‌اند؛ snapshot فقط کپی چند dict کوچک است
+            self.worker.submit(compute_analytics, self._agg.snapshot())
+        else:
+            # تجمیع بازه (پیمایش روزها و دسته‌ها) روی نخ worker از دیتابیس
+            self.worker.submit_query(analytics_between, self.bounds)
+        if self._poll_job is None:
+            self._poll_job = self.after(POLL_MS, self._poll_worker)
+
+    def _poll_worker(self):
+        self._poll_job = None
+        result = self.worker.poll()
+        if isinstance(result, Exception):
+            messagebox.showerror("Analytics", f"محاسبهٔ آمار ناموفق بود:\n{result}")
+        elif result is not None:
+            self._render(result)
+        if self.worker.pending:
+            self._poll_job = self.after(POLL_MS, self._poll_worker)
+
+    def destroy(self):
+        self.worker.close()
+        super().destroy()
+
+    def _render(self, result):
+        for key, text in result["stats"]:
+            self.stat_vars[key].set(text)
 
         # pie
-        self.ax_pie.clear()
-        exp_by_cat = defaultdict(Decimal)
-        for t in transactions:
-            if t["amount"] < 0:
-                exp_by_cat[t["category"]] += -t["amount"]
-        if exp_by_cat:
-            labels = list(exp_by_cat.keys())
-            values = [float(v) for v in exp_by_cat.values()]
-            self.ax_pie.pie(values, labels=labels, autopct="%1.1f%%", startangle=140)
-            self.ax_pie.set_title("Expense Distribution by Category")
-        else:
-            self.ax_pie.text(0.5, 0.5, "No expense data", ha="center", va="center")
-        self.canvas_left.draw()
-
-        # bar 6 ماه اخیر
-        self.ax_bar.clear()
-        inc_by_month = defaultdict(Decimal)
-        exp_by_month = defaultdict(Decimal)
-        for t in transactions:
-            ym = month_key(t["date"])
-            if t["amount"] >= 0:
-                inc_by_month[ym] += t["amount"]
-            else:
-                exp_by_month[ym] += -t["amount"]
-        months = sorted(set(inc_by_month) | set(exp_by_month), reverse=True)[:6]
-        months.sort()
-        if months:
-            xi = range(len(months))
-            width = 0.35
-            inc_vals = [float(inc_by_month.get(m, 0)) for m in months]
-            exp_vals = [float(exp_by_month.get(m, 0)) for m in months]
-            self.ax_bar.bar(
-                [x - width / 2 for x in xi], inc_vals, width=width, label="Income"
-            )
-            self.ax_bar.bar(
-                [x + width / 2 for x in xi], exp_vals, width=width, label="Expense"
-            )
-            self.ax_bar.set_xticks(list(xi))
-            self.ax_bar.set_xticklabels(months, rotation=45)
-            self.ax_bar.set_ylabel(f"Amount ({CURRENCY})")
-            self.ax_bar.set_title("Income vs Expense (Last 6 Months)")
-            self.ax_bar.legend()
-        else:
-            self.ax_bar.text(0.5, 0.5, "No data", ha="center", va="center")
-        self.canvas_right.draw()
+        full = self.pie_chart.update(result["pie"])
+        self._blit(self.canvas_left, self.pie_chart, full)
+
+        # bar: 6 ماه اخیر یا ستون‌های بازهٔ انتخاب‌شده
+        full = self.bar_chart.update(
+            result["labels"], result["inc"], result["exp"], self._title
+        )
+        self._blit(self.canvas_right, self.bar_chart, full)
 
 
 # ---------------------- Budget Tab ----------------------
 class BudgetUI(ttk.Frame):
-    def __init__(self, master):
+    ALL = "All categories"
+
+    def __init__(self, master, engine):
         super().__init__(master, padding=12)
-        self.monthly_budget = Decimal("0")
-        self.current_month = datetime.now().strftime("%Y-%m")
-        self.spent_this_month = Decimal("0")
+        self.engine = engine
         self._build_ui()
         self._refresh_view()
+        self.after(MONTH_CHECK_MS, self._check_month)
 
     def _build_ui(self):
         self.columnconfigure(0, weight=1)
+        self.rowconfigure(3, weight=1)
 
         # Setup
         setup = ttk.LabelFrame(self, text="Monthly Budget Setup", padding=10)
@@ -421,8 +1419,24 @@ class BudgetUI(ttk.Frame):
         self.budget_var = tk.StringVar(value="0.0")
         self.budget_entry = ttk.Entry(setup, textvariable=self.budget_var)
         self.budget_entry.grid(row=0, column=1, sticky="ew", padx=(6, 6))
+        self.scope_var = tk.StringVar(value=self.ALL)
+        ttk.Combobox(
+            setup,
+            textvariable=self.scope_var,
+            values=[self.ALL] + CATEGORY_MAP["expense"],
+            state="readonly",
+            width=16,
+        ).grid(row=0, column=2, padx=(0, 6))
+        self.period_var = tk.StringVar(value="Every month")
+        ttk.Combobox(
+            setup,
+            textvariable=self.period_var,
+            values=["Every month", "This month only"],
+            state="readonly",
+            width=16,
+        ).grid(row=0, column=3, padx=(0, 6))
         ttk.Button(setup, text="Set Budget", command=self._set_budget).grid(
-            row=0, column=2
+            row=0, column=4
         )
 
         # Progress
@@ -446,9 +1460,20 @@ class BudgetUI(ttk.Frame):
             row=2, column=0, pady=(6, 0)
         )
 
+        # Category budgets
+        cats = ttk.LabelFrame(self, text="Category Budgets", padding=10)
+        cats.grid(row=2, column=0, sticky="ew", pady=(10, 0))
+        cats.columnconfigure(0, weight=1)
+        cols = ("Category", "Budget", "Spent", "Remaining", "Used")
+        self.cat_tree = ttk.Treeview(cats, columns=cols, show="headings", height=5)
+        for c, w in zip(cols, (160, 110, 110, 110, 80)):
+            self.cat_tree.heading(c, text=c)
+            self.cat_tree.column(c, width=w, anchor="w" if c == "Category" else "e")
+        self.cat_tree.grid(row=0, column=0, sticky="ew")
+
         # Alerts
         alerts = ttk.LabelFrame(self, text="Budget Alerts", padding=10)
-        alerts.grid(row=2, column=0, sticky="nsew", pady=(10, 0))
+        alerts.grid(row=3, column=0, sticky="nsew", pady=(10, 0))
         alerts.rowconfigure(0, weight=1)
         alerts.columnconfigure(0, weight=1)
         self.alerts = tk.Text(alerts, height=8, wrap="word")
@@ -468,72 +1493,87 @@ class BudgetUI(ttk.Frame):
             )
             self.budget_entry.focus_set()
             return
-        self.monthly_budget = abs(value)
+        scope = "" if self.scope_var.get() == self.ALL else self.scope_var.get()
+        month = self.engine.month if self.period_var.get() == "This month only" else ""
+        self.engine.set_budget(abs(value), scope, month)
         self._refresh_view()
 
     def update_from_transactions(self, transactions):
-        # هزینه‌های ماه جاری
-        this_month = datetime.now().strftime("%Y-%m")
-        self.current_month = this_month
-        self.spent_this_month = sum(
-            (-t["amount"])
-            for t in transactions
-            if t["amount"] < 0 and month_key(t["date"]) == this_month
-        )
+        self.engine.load_transactions(transactions)
         self._refresh_view()
 
+    def on_ledger_event(self, event):
+        if event.kind in (TX_CLEARED, TX_RELOADED):
+            self.engine.reload()
+        else:
+            self.engine.apply(event.removed, event.added)
+        self._refresh_view()
+
+    def _check_month(self):
+        if self.engine.roll_month():
+            self._refresh_view()
+        self.after(MONTH_CHECK_MS, self._check_month)
+
     def _refresh_view(self):
-        spent = self.spent_this_month
-        budget = self.monthly_budget
+        budget, spent, pct = self.engine.status()
         remaining = max(Decimal("0"), budget - spent)
-        pct = float((spent / budget * 100) if budget > 0 else 0)
         self.progress["value"] = min(100, pct)
         self.summary_var.set(
             f"Budget: {CURRENCY}{budget:,.2f} | Spent: {CURRENCY}{spent:,.2f} | Remaining: {CURRENCY}{remaining:,.2f}"
         )
         self.percent_var.set(f"{pct:.1f}%")
-        self._update_alerts(pct)
 
-    def _update_alerts(self, pct):
+        self.cat_tree.delete(*self.cat_tree.get_children())
+        for scope in self.engine.scopes():
+            if not scope:
+                continue
+            budget, spent, pct = self.engine.status(scope)
+            self.cat_tree.insert(
+                "",
+                "end",
+                values=(
+                    scope,
+                    f"{CURRENCY}{budget:,.2f}",
+                    f"{CURRENCY}{spent:,.2f}",
+                    f"{CURRENCY}{max(Decimal('0'), budget - spent):,.2f}",
+                    f"{pct:.1f}%",
+                ),
+            )
+        self._update_alerts()
+
+    def _update_alerts(self):
+        # فقط پیام‌های عبور از آستانه (جدیدترین اول)؛ بدون محاسبهٔ دوباره
         self.alerts.delete("1.0", tk.END)
-        msgs = []
-        if self.monthly_budget <= 0:
+        msgs = list(self.engine.alerts)
+        if not self.engine.budgets:
             msgs.append("• Set a monthly budget to start tracking.")
-        else:
-            if pct >= 100:
-                msgs.append("• ALERT: You have exceeded your monthly budget!")
-            elif pct >= 90:
-                msgs.append("• WARNING: You have used 90% of your budget.")
-            elif pct >= 75:
-                msgs.append("• NOTICE: You have used 75% of your budget.")
-            elif pct >= 50:
-                msgs.append("• Heads-up: 50% of your budget is used.")
-            else:
-                msgs.append("• You're within your budget. Keep it up!")
+        elif not msgs:
+            msgs.append("• You're within your budget. Keep it up!")
         self.alerts.insert(tk.END, "\n".join(msgs))
 
 
 # ---------------------- Main App with tabs ----------------------
 class WalletApp(ttk.Notebook):
-    def __init__(self, master):
+    def __init__(self, master, store):
         super().__init__(master)
         self.pack(fill="both", expand=True)
 
-        self.analytics_tab = AnalyticsUI(self)
-        self.budget_tab = BudgetUI(self)
-        self.transactions_tab = TransactionsUI(
-            self, on_change=self._on_transactions_changed
-        )
+        self.bus = EventBus()
+        self.analytics_tab = AnalyticsUI(self, store)
+        self.budget_tab = BudgetUI(self, BudgetEngine(store))
+        self.transactions_tab = TransactionsUI(self, store, bus=self.bus)
+        self.bus.subscribe(self.analytics_tab.on_ledger_event)
+        self.bus.subscribe(self.budget_tab.on_ledger_event)
 
         self.add(self.transactions_tab, text="Transactions")
         self.add(self.analytics_tab, text="Analytics")
         self.add(self.budget_tab, text="Budget")
 
-        self._seed_sample_data()  # اختیاری
-
-    def _on_transactions_changed(self, transactions):
-        self.analytics_tab.update_from_transactions(transactions)
-        self.budget_tab.update_from_transactions(transactions)
+        if store.count():
+            self.transactions_tab._notify(TX_RELOADED)
+        else:
+            self._seed_sample_data()  # فقط برای دیتابیس خالی
+        self.transactions_tab.materialize_recurring()
 
     def _seed_sample_data(self):
         samples = [
@@ -548,26 +1588,30 @@ class WalletApp(ttk.Notebook):
             (-380.25, "Food", "Grocery shopping", "2025-09-05 16:30"),
             (-200, "Healthcare", "Doctor visit", "2025-09-10 10:30"),
         ]
-        for amt, cat, desc, dt in samples:
-            data = {
-                "id": len(self.transactions_tab.transactions) + 1,
-                "amount": Decimal(str(amt)),
-                "type": "Income" if amt >= 0 else "Expense",
-                "category": cat,
-                "description": desc,
-                "date": dt,
-            }
-            self.transactions_tab.transactions.append(data)
-            self.transactions_tab._insert_row(data)
-        self.transactions_tab._refresh_balance()
-        self._on_transactions_changed(self.transactions_tab.transactions)
+        rows = [
+            make_transaction(Decimal(str(amt)), cat, desc, dt)
+            for amt, cat, desc, dt in samples
+        ]
+        self.transactions_tab._add_rows(rows)
 
 
 # ---------------------- Run ----------------------
 if __name__ == "__main__":
+    mark_startup("imports")
     root = tk.Tk()
     root.title(APP_TITLE)
     root.geometry("980x700")
     root.minsize(900, 640)
-    app = WalletApp(root)
+    store = LedgerStore()
+    app = WalletApp(root, store)
+    mark_startup("ui_built")
+    timing = os.environ.get("WALLET_TIMING")
+    if timing:
+        root.wait_visibility(root)
+        mark_startup("first_window")
+        report_startup(timing)
+        if os.environ.get("WALLET_EXIT_AFTER_START"):
+            root.after(0, root.destroy)
     root.mainloop()
+    app.bus.close()
+    store.close()
@@ -2,25 +2,65 @@ import tkinter as tk
 from tkinter import messagebox
 from tkinter import ttk  
 import json
+import os
+from collections import defaultdict
 from datetime import datetime
 
+from wallet import Money, MoneyArray
+
+JOURNAL_FILE = "wallet_data.jsonl"
+COMPACT_EVERY = 500  # journal lines before they are folded into the snapshot
+HISTORY_WINDOW = 300  # newest rows kept in the history table
+HISTORY_PAGE = 200  # older rows added per "Show Older" click
+
 # Basic Wallet Class
+# Transactions are appended to a JSON-lines journal (one line per add), and
+# every COMPACT_EVERY adds the whole state is folded into <journal>.snapshot.
+# Both files are replaced atomically, and every record carries a sequence
+# number, so a crash at any point loses at most the line being written.
 class BasicWallet:
-    def __init__(self):
+    def __init__(self, filename=None):
         self.transactions = []  
-        self.balance = 0  
+        self.balance = Money()  
         self.categories = ['Salary', 'Entertainment', 'Food', 'Transport']  
+        self.totals = {'income': Money(), 'expense': Money()}
+        self.by_category = defaultdict(Money)  # signed net per category
+        self.filename = None
+        self.seq = 0  # sequence number of the last transaction
+        self.pending = 0  # journal lines since the last compaction
+        self.journal = None
+        self.rewrite = False  # journal must be compacted before appending
+        if filename:
+            self.open(filename)
+
+    def _apply(self, transaction):
+        amount = transaction['amount']
+        self.transactions.append(transaction)
+        self.totals[transaction['type']] += amount
+        if transaction['type'] == 'income':
+            self.balance += amount
+            self.by_category[transaction['category']] += amount
+        else:
+            self.balance -= amount
+            self.by_category[transaction['category']] -= amount
 
     def add_transaction(self, amount, category, transaction_type, description):
         transaction = {
-            'amount': amount,
+            'amount': Money.of(amount),
             'type': transaction_type,
             'category': category,
             'description': description,
             'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
-        self.transactions.append(transaction)
-        self.balance += amount if transaction_type == 'income' else -amount  # Update balance
+        self._apply(transaction)  # Update balance
+        self.seq += 1
+        if self.journal:
+            record = dict(transaction, seq=self.seq)
+            self.journal.write(json.dumps(record, default=str) + "\n")
+            self.journal.flush()
+            self.pending += 1
+            if self.pending >= COMPACT_EVERY:
+                self.save_to_json()
         return transaction
 
     def get_balance(self):
@@ -29,13 +69,104 @@ class BasicWallet:
     def get_transaction_history(self):
         return self.transactions
 
-    def save_to_json(self, filename="wallet_data.json"):
-        with open(filename, "w") as file:
-            json.dump(self.transactions, file)
-
-    def load_from_json(self, filename="wallet_data.json"):
-        with open(filename, "r") as file:
-            self.transactions = json.load(file)
+    def open(self, filename=JOURNAL_FILE):
+        # Load whatever is on disk, then keep the journal open for appends
+        self.close()
+        self.load_from_json(filename)
+        self.filename = filename
+        if self.rewrite:
+            self.save_to_json()  # don't append to a partial line or old format
+        self.journal = open(filename, "a", encoding="utf-8")
+
+    def close(self):
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+
+    def save_to_json(self, filename=None):
+        # Compaction: write the full state as a snapshot, then start an empty
+        # journal. If we crash in between, the loader skips journal lines the
+        # snapshot already covers (seq <= snapshot seq).
+        filename = filename or self.filename or JOURNAL_FILE
+        header = {'seq': self.seq, 'count': len(self.transactions),
+                  'balance': str(self.balance)}
+        _write_atomic(filename + ".snapshot",
+                      [header] + self.transactions)
+        reopen = self.journal is not None and filename == self.filename
+        self.close()
+        _write_atomic(filename, [])
+        self.pending = 0
+        if reopen:
+            self.journal = open(filename, "a", encoding="utf-8")
+
+    def load_from_json(self, filename=JOURNAL_FILE):
+        # One streaming pass over snapshot + journal. Amounts are collected as
+        # integer cents and balance / totals / per-category nets are summed
+        # over those columns at the end instead of row by row.
+        self.transactions = []
+        self.seq = self.pending = 0
+        self.rewrite = False
+        amounts, signed, types, categories = MoneyArray(), MoneyArray(), [], []
+
+        def take(transaction):
+            transaction['amount'] = amount = Money.of(transaction['amount'])
+            self.transactions.append(transaction)
+            amounts.append(amount)
+            signed.append(amount if transaction['type'] == 'income' else -amount)
+            types.append(transaction['type'])
+            categories.append(transaction['category'])
+
+        snapshot = filename + ".snapshot"
+        if os.path.exists(snapshot):
+            with open(snapshot, encoding="utf-8") as file:
+                header = json.loads(file.readline())
+                for line in file:
+                    take(json.loads(line))
+            self.seq = header['seq']
+        if os.path.exists(filename):
+            with open(filename, encoding="utf-8") as file:
+                for number, line in enumerate(file, 1):
+                    if not line.endswith("\n"):
+                        self.rewrite = True  # an append would join this line
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        if next(file, None) is not None:
+                            # Only the last line can be cut short by a crash;
+                            # refuse to open rather than drop the lines after it
+                            raise ValueError(f"{filename}: line {number} is corrupt")
+                        self.rewrite = True
+                        break
+                    if isinstance(record, list):
+                        # old save_to_json format: the whole list on one line,
+                        # without a trailing newline; rewritten as a snapshot
+                        for transaction in record:
+                            take(transaction)
+                        self.seq += len(record)
+                        self.rewrite = True
+                        continue
+                    seq = record.pop('seq')
+                    if seq <= self.seq:
+                        continue  # already in the snapshot
+                    take(record)
+                    self.seq = seq
+                    self.pending += 1
+
+        self.balance = signed.total()
+        self.totals = {'income': Money(), 'expense': Money()}
+        self.totals.update(amounts.group_total(types))
+        self.by_category = defaultdict(Money, signed.group_total(categories))
+
+
+def _write_atomic(path, records):
+    # Write to a temp file, fsync, then rename over the target
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as file:
+        for record in records:
+            file.write(json.dumps(record, default=str) + "\n")
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp, path)
 
 # Tkinter Window
 class WalletApp:
@@ -93,6 +224,13 @@ class WalletApp:
         self.history_frame = tk.Frame(root)
         self.history_frame.pack(fill="both", padx=10, pady=5)
 
+        # Only the newest HISTORY_WINDOW rows live in the Treeview; older ones
+        # are inserted on demand. first_shown is the index of the top row.
+        self.older_button = tk.Button(self.history_frame, text="Show Older", command=self.show_older)
+        self.older_button.pack(anchor="w")
+        self.window = HISTORY_WINDOW
+        self.first_shown = 0
+
         self.history_tree = self.create_tree_view(self.history_frame)
         self.update_history()
 
@@ -111,18 +249,18 @@ class WalletApp:
 
     def add_transaction(self):
         try:
-            amount = float(self.amount_entry.get())
+            amount = Money.parse(self.amount_entry.get())
             category = self.category_var.get()
             description = self.description_entry.get()
             transaction_type = self.type_var.get()
 
-            if amount == 0:
+            if not amount:
                 messagebox.showerror("Input Error", "Amount cannot be zero!")
                 return
 
             transaction = self.wallet.add_transaction(amount, category, transaction_type, description)
             self.update_balance()
-            self.update_history()
+            self.append_history([transaction])
 
             # Clear form
             self.clear_form()
@@ -135,19 +273,56 @@ class WalletApp:
     def update_balance(self):
         self.balance_label.config(text=f"Current Balance: ${self.wallet.get_balance():,.2f}")
 
+    def row_values(self, index, transaction):
+        return (
+            index + 1,
+            f"{transaction['amount']:+,.2f}",
+            transaction['type'],
+            transaction['category'],
+            transaction['description'] or "No description",
+            transaction['date']
+        )
+
     def update_history(self):
-        for row in self.history_tree.get_children():
-            self.history_tree.delete(row)
-
-        for index, transaction in enumerate(self.wallet.get_transaction_history()):
-            self.history_tree.insert("", "end", values=(
-                index + 1,
-                f"{transaction['amount']:+,.2f}",
-                transaction['type'],
-                transaction['category'],
-                transaction['description'] or "No description",
-                transaction['date']
-            ))
+        # Full reload (startup / bulk load): one delete call, then only the
+        # newest window is inserted; Tk lays the table out once when idle.
+        history = self.wallet.get_transaction_history()
+        self.history_tree.delete(*self.history_tree.get_children())
+        self.window = HISTORY_WINDOW
+        self.first_shown = max(0, len(history) - self.window)
+        insert = self.history_tree.insert
+        for index in range(self.first_shown, len(history)):
+            insert("", "end", iid=index, values=self.row_values(index, history[index]))
+        self.update_older_button()
+
+    def append_history(self, transactions):
+        # New rows go at the end; the oldest rows beyond the window are dropped
+        history = self.wallet.get_transaction_history()
+        start = len(history) - len(transactions)
+        if len(transactions) > self.window:
+            self.update_history()
+            return
+        insert = self.history_tree.insert
+        for index in range(start, len(history)):
+            insert("", "end", iid=index, values=self.row_values(index, history[index]))
+        extra = len(history) - self.first_shown - self.window
+        if extra > 0:
+            self.history_tree.delete(*range(self.first_shown, self.first_shown + extra))
+            self.first_shown += extra
+        self.update_older_button()
+
+    def show_older(self):
+        history = self.wallet.get_transaction_history()
+        start = max(0, self.first_shown - HISTORY_PAGE)
+        insert = self.history_tree.insert
+        for index in range(self.first_shown - 1, start - 1, -1):
+            insert("", 0, iid=index, values=self.row_values(index, history[index]))
+        self.window += self.first_shown - start
+        self.first_shown = start
+        self.update_older_button()
+
+    def update_older_button(self):
+        self.older_button.config(state=tk.NORMAL if self.first_shown else tk.DISABLED)
 
     def clear_form(self):
         self.amount_entry.delete(0, tk.END)
@@ -155,10 +330,11 @@ class WalletApp:
 
 # Tkinter Main Loop
 def main():
-    wallet = BasicWallet()
+    wallet = BasicWallet(JOURNAL_FILE)
     root = tk.Tk()
     app = WalletApp(root, wallet)
     root.mainloop()
+    wallet.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,80 @@
+# هستهٔ کیف پول بدون وابستگی به Tk: ذخیره، جمع‌ها، بودجه، جستجو، ورود/خروج
+from .aggregates import LedgerAggregates
+from .analytics import (
+    AnalyticsWorker,
+    analytics_between,
+    analytics_from_transactions,
+    compute_analytics,
+)
+from .budget import BUDGET_THRESHOLDS, BudgetEngine, budget_alert, current_month
+from .columnar import ColumnarLedger, load_numpy
+from .config import (
+    ALL_CATEGORIES,
+    BASE_CURRENCY,
+    CATEGORY_MAP,
+    COLUMNAR_MIN_ROWS,
+    CURRENCY,
+    CURRENCY_SYMBOLS,
+    DATE_FMT,
+    DB_PATH,
+    DEFAULT_ACCOUNT,
+    EPOCH_ORDINAL,
+    EXPORT_CHUNK,
+    HEAP_SEED,
+    IMPORT_BATCH,
+    MAX_BUCKETS,
+    RECENT_MONTHS,
+)
+from .events import (
+    TX_ADDED,
+    TX_CLEARED,
+    TX_RELOADED,
+    TX_REMOVED,
+    TX_UPDATED,
+    EventBus,
+    LedgerEvent,
+    classify_delta,
+)
+from .fx import FxRates
+from .io import (
+    EXPORT_HEADER,
+    batches,
+    import_file,
+    normalize_date,
+    parse_records,
+    read_csv_records,
+    read_ofx_records,
+    read_rate_records,
+    write_csv,
+)
+from .money import (
+    Money,
+    MoneyArray,
+    fmt_amount,
+    from_cents,
+    parse_amount,
+    round_cents,
+    to_cents,
+)
+from .recurring import (
+    FREQUENCIES,
+    MONTHLY,
+    WEEKLY,
+    RecurringRule,
+    RecurringScheduler,
+)
+from .search import build_search
+from .store import LedgerReader, LedgerStore
+from .timeutil import (
+    RANGES,
+    day_month,
+    day_number,
+    day_string,
+    day_to_date,
+    format_ts,
+    month_key,
+    parse_ts,
+    range_bounds,
+    range_buckets,
+)
+from .transaction import Transaction, make_transaction
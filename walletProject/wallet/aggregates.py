@@ -0,0 +1,276 @@
+import bisect
+import heapq
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from .columnar import ColumnarLedger, load_numpy
+from .config import COLUMNAR_MIN_ROWS, HEAP_SEED, RECENT_MONTHS
+from .money import from_cents
+from .timeutil import day_number, day_to_date, range_buckets
+
+
+class LedgerAggregates:
+    def __init__(self):
+        self.clear()
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        if len(transactions) >= COLUMNAR_MIN_ROWS and load_numpy() is not None:
+            # جمع‌ها برداری حساب و در خود agg ریخته می‌شوند؛ ستون‌ها نگه داشته
+            # نمی‌شوند چون add/remove بعدی آن‌ها را به‌روز نمی‌کند
+            columns = ColumnarLedger()
+            columns.extend(transactions)
+            agg = cls.from_store(columns)
+            agg._source = None
+            for day, exp, n in columns.day_expenses():
+                agg._day_exps[day][exp] = n
+            return agg
+        agg = cls()
+        for t in transactions:
+            agg.add(t)
+        return agg
+
+    @classmethod
+    def from_store(cls, store):
+        # store می‌تواند LedgerStore (GROUP BY در دیتابیس) یا ColumnarLedger باشد
+        agg = cls()
+        agg._source = store
+        for r in store.month_totals():
+            ym = r["ym"]
+            agg.count += r["n"]
+            agg._month_counts[ym] = r["n"]
+            if r["income"]:
+                agg.inc_by_month[ym] = from_cents(r["income"])
+                agg.income += agg.inc_by_month[ym]
+            if r["n_exp"]:
+                agg.exp_by_month[ym] = from_cents(r["expense"])
+                agg._exp_month_counts[ym] = r["n_exp"]
+                agg.expense += agg.exp_by_month[ym]
+        for r in store.category_expenses():
+            agg.exp_by_cat[r["category"]] = from_cents(r["expense"])
+            agg._exp_cat_counts[r["category"]] = r["n"]
+        agg._add_day_totals(store.day_totals())
+        agg._seed_heap()
+        return agg
+
+    @classmethod
+    def from_days(cls, source, first, last):
+        # فقط rollup روزانهٔ بازه؛ کافی برای snapshot(bounds) همان بازه
+        agg = cls()
+        agg._source = source
+        agg._add_day_totals(source.day_totals_between(first, last))
+        return agg
+
+    def _add_day_totals(self, rows):
+        for r in rows:
+            day = day_number(r["day"])
+            self._day_counts[day] += r["n"]
+            if r["income"]:
+                self.inc_by_day[day] += from_cents(r["income"])
+            if r["n_exp"]:
+                exp = from_cents(r["expense"])
+                self.exp_by_day[day] += exp
+                self.exp_by_day_cat[day][r["category"]] = exp
+
+    def _seed_heap(self):
+        # فقط HEAP_SEED هزینهٔ بزرگ در heap نگه داشته می‌شود؛ مقادیر کوچک‌تر از
+        # _heap_floor بیرون heap هستند و با خالی شدن آن دوباره خوانده می‌شوند
+        if self._source is not None:
+            top = self._source.largest_expenses(HEAP_SEED)
+        else:
+            top = heapq.nlargest(
+                HEAP_SEED,
+                (
+                    exp
+                    for exps in self._day_exps.values()
+                    for exp, n in exps.items()
+                    for _ in range(n)
+                ),
+            )
+        self._exp_heap = [-v for v in top]
+        heapq.heapify(self._exp_heap)
+        self._exp_removed = Counter()
+        self._heap_floor = top[-1] if len(top) == HEAP_SEED else None
+
+    def clear(self):
+        self.count = 0
+        self.income = Decimal("0")
+        self.expense = Decimal("0")
+        self.inc_by_month = defaultdict(Decimal)
+        self.exp_by_month = defaultdict(Decimal)
+        self.exp_by_cat = defaultdict(Decimal)
+        self._month_counts = Counter()
+        self._exp_month_counts = Counter()
+        self._exp_cat_counts = Counter()
+        # rollup روزانه برای بازه‌های زمانی؛ کلید = شمارهٔ روز
+        self.inc_by_day = defaultdict(Decimal)
+        self.exp_by_day = defaultdict(Decimal)
+        self.exp_by_day_cat = defaultdict(Counter)
+        self._day_counts = Counter()
+        # مبلغ هزینه‌ها -> تعداد، به‌ازای هر روز؛ فقط وقتی منبعی برای پرس‌وجو نیست
+        self._day_exps = defaultdict(Counter)
+        # max-heap of expenses (negated) with lazy deletion
+        self._exp_heap = []
+        self._exp_removed = Counter()
+        self._heap_floor = None
+        self._source = getattr(self, "_source", None)
+
+    @property
+    def balance(self) -> Decimal:
+        return self.income - self.expense
+
+    def add(self, tr):
+        amount = tr.amount
+        ym = tr.ym
+        day = tr.day
+        self.count += 1
+        self._month_counts[ym] += 1
+        self._day_counts[day] += 1
+        if amount >= 0:
+            self.income += amount
+            self.inc_by_month[ym] += amount
+            self.inc_by_day[day] += amount
+            return
+        exp = -amount
+        cat = tr.category
+        self.expense += exp
+        self.exp_by_month[ym] += exp
+        self.exp_by_cat[cat] += exp
+        self.exp_by_day[day] += exp
+        self.exp_by_day_cat[day][cat] += exp
+        if self._source is None:
+            self._day_exps[day][exp] += 1
+        self._exp_month_counts[ym] += 1
+        self._exp_cat_counts[cat] += 1
+        if self._heap_floor is None or exp >= self._heap_floor:
+            heapq.heappush(self._exp_heap, -exp)
+
+    def remove(self, tr):
+        amount = tr.amount
+        ym = tr.ym
+        day = tr.day
+        self.count -= 1
+        self._month_counts[ym] -= 1
+        self._day_counts[day] -= 1
+        if amount >= 0:
+            self.income -= amount
+            self.inc_by_month[ym] -= amount
+            self.inc_by_day[day] -= amount
+        else:
+            exp = -amount
+            cat = tr.category
+            self.expense -= exp
+            self.exp_by_month[ym] -= exp
+            self.exp_by_cat[cat] -= exp
+            self.exp_by_day[day] -= exp
+            self.exp_by_day_cat[day][cat] -= exp
+            self._exp_month_counts[ym] -= 1
+            self._exp_cat_counts[cat] -= 1
+            exps = self._day_exps.get(day)
+            if exps:
+                exps[exp] -= 1
+                if not exps[exp]:
+                    del exps[exp]
+                    if not exps:
+                        del self._day_exps[day]
+            if not self._exp_month_counts[ym]:
+                del self._exp_month_counts[ym]
+                del self.exp_by_month[ym]
+            if not self._exp_cat_counts[cat]:
+                del self._exp_cat_counts[cat]
+                del self.exp_by_cat[cat]
+            if self._heap_floor is None or exp >= self._heap_floor:
+                self._exp_removed[exp] += 1
+        if not self._month_counts[ym]:
+            del self._month_counts[ym]
+            self.inc_by_month.pop(ym, None)
+        if not self._day_counts[day]:
+            del self._day_counts[day]
+            for by_day in (self.inc_by_day, self.exp_by_day, self.exp_by_day_cat):
+                by_day.pop(day, None)
+
+    def largest_expense(self) -> Decimal:
+        heap = self._exp_heap
+        removed = self._exp_removed
+        while heap and removed[-heap[0]]:
+            top = -heapq.heappop(heap)
+            removed[top] -= 1
+            if not removed[top]:
+                del removed[top]
+        if not heap and self._heap_floor is not None and self._exp_cat_counts:
+            self._seed_heap()
+            heap = self._exp_heap
+        return -heap[0] if heap else Decimal("0")
+
+    def avg_monthly_expense(self) -> Decimal:
+        if not self.exp_by_month:
+            return Decimal("0")
+        return self.expense / len(self.exp_by_month)
+
+    def months(self):
+        return sorted(self._month_counts)
+
+    def last_months(self, n):
+        return sorted(self._month_counts, reverse=True)[:n][::-1]
+
+    def _days_between(self, first, last):
+        # هر بازه حداکثر به اندازهٔ تعداد روزهای دارای تراکنش پیمایش می‌شود
+        if last - first < len(self._day_counts):
+            return [d for d in range(first, last + 1) if d in self._day_counts]
+        return sorted(d for d in self._day_counts if first <= d <= last)
+
+    def _largest_between(self, first, last, days):
+        source = self._source
+        if source is not None:
+            return source.largest_expense_between(first, last)
+        by_day = self._day_exps
+        return max((max(by_day[d]) for d in days if d in by_day), default=Decimal("0"))
+
+    def snapshot(self, bounds=None):
+        # کپی سبک برای نخ تحلیل؛ largest_expense ممکن است از دیتابیس بخواند پس همین‌جا
+        if bounds is None:
+            months = self.last_months(RECENT_MONTHS)
+            return {
+                "income": self.income,
+                "expense": self.expense,
+                "count": self.count,
+                "largest": self.largest_expense(),
+                "avg": self.avg_monthly_expense(),
+                "buckets": [
+                    (m, self.inc_by_month.get(m, 0), self.exp_by_month.get(m, 0))
+                    for m in months
+                ],
+                "exp_by_cat": dict(self.exp_by_cat),
+            }
+        first, last = bounds
+        buckets = range_buckets(first, last)
+        starts = [b[1] for b in buckets]
+        inc_vals = [Decimal("0")] * len(buckets)
+        exp_vals = [Decimal("0")] * len(buckets)
+        by_cat = defaultdict(Decimal)
+        exp_months = set()
+        count = 0
+        days = self._days_between(first, last)
+        for d in days:
+            i = bisect.bisect_right(starts, d) - 1
+            count += self._day_counts[d]
+            inc_vals[i] += self.inc_by_day.get(d, 0)
+            exp = self.exp_by_day.get(d)
+            if exp:
+                exp_vals[i] += exp
+                exp_months.add(day_to_date(d).strftime("%Y-%m"))
+                for cat, v in self.exp_by_day_cat[d].items():
+                    by_cat[cat] += v
+        income, expense = sum(inc_vals), sum(exp_vals)
+        return {
+            "income": income,
+            "expense": expense,
+            "count": count,
+            "largest": self._largest_between(first, last, days),
+            "avg": expense / len(exp_months) if exp_months else Decimal("0"),
+            "buckets": [
+                (label, inc, exp)
+                for (label, _, _), inc, exp in zip(buckets, inc_vals, exp_vals)
+            ],
+            "exp_by_cat": {cat: v for cat, v in by_cat.items() if v},
+        }
@@ -0,0 +1,104 @@
+import queue
+import threading
+
+from .aggregates import LedgerAggregates
+from .config import CURRENCY
+from .store import LedgerReader
+
+
+def compute_analytics(snap):
+    buckets = snap["buckets"]
+    return {
+        "stats": [
+            ("Total Income", f"{CURRENCY}{snap['income']:,.2f}"),
+            ("Total Expenses", f"{CURRENCY}{snap['expense']:,.2f}"),
+            ("Net Savings", f"{CURRENCY}{snap['income'] - snap['expense']:,.2f}"),
+            ("Transactions", str(snap["count"])),
+            ("Avg Monthly Expense", f"{CURRENCY}{snap['avg']:,.2f}"),
+            ("Largest Expense", f"{CURRENCY}{snap['largest']:,.2f}"),
+        ],
+        "pie": snap["exp_by_cat"],
+        "labels": [label for label, _, _ in buckets],
+        "inc": [float(inc) for _, inc, _ in buckets],
+        "exp": [float(exp) for _, _, exp in buckets],
+    }
+
+
+def analytics_from_transactions(transactions, bounds=None):
+    return compute_analytics(
+        LedgerAggregates.from_transactions(transactions).snapshot(bounds)
+    )
+
+
+def analytics_between(source, bounds):
+    # جمع بازه از rollup روزانهٔ دیتابیس؛ روی نخ worker با اتصال خودش
+    first, last = bounds
+    return compute_analytics(
+        LedgerAggregates.from_days(source, first, last).snapshot(bounds)
+    )
+
+
+class AnalyticsWorker:
+    # یک نخ ثابت؛ هر کار یک generation دارد و نتیجهٔ کهنه دور ریخته می‌شود
+    def __init__(self, store=None):
+        self.store = store
+        self.reader = None  # LedgerReader؛ فقط داخل نخ worker ساخته و استفاده می‌شود
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.generation = 0
+        self.delivered = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, fn, *args):
+        self.generation += 1
+        self.jobs.put((self.generation, fn, args))
+
+    def submit_query(self, fn, *args):
+        # fn(reader, *args) روی اتصال فقط‌خواندنی خود worker
+        self.submit(lambda: fn(self.reader, *args))
+
+    @property
+    def pending(self):
+        return self.delivered < self.generation
+
+    def _run(self):
+        if self.store is not None:
+            self.reader = LedgerReader(self.store)
+        try:
+            self._loop()
+        finally:
+            if self.reader is not None:
+                self.reader.close()
+
+    def _loop(self):
+        while True:
+            job = self.jobs.get()
+            # اگر چند کار پشت هم آمده، فقط آخرین اجرا می‌شود
+            while job is not None and not self.jobs.empty():
+                job = self.jobs.get_nowait()
+            if job is None:
+                return
+            gen, fn, args = job
+            if gen != self.generation:
+                continue
+            try:
+                result = fn(*args)
+            except Exception as e:
+                result = e
+            if gen == self.generation:
+                self.results.put((gen, result))
+
+    def poll(self):
+        # فقط روی نخ Tk صدا زده می‌شود؛ آخرین نتیجهٔ تازه یا None
+        latest = None
+        while True:
+            try:
+                gen, result = self.results.get_nowait()
+            except queue.Empty:
+                return latest
+            if gen == self.generation:
+                self.delivered = gen
+                latest = result
+
+    def close(self):
+        self.jobs.put(None)
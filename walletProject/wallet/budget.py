@@ -0,0 +1,116 @@
+from collections import defaultdict, deque
+from datetime import datetime
+from decimal import Decimal
+
+from .money import from_cents
+
+# شمارنده‌های هزینه برای (ماه، scope) با هر تراکنش به‌روز می‌شوند؛ scope خالی = کل
+BUDGET_THRESHOLDS = (50, 75, 90, 100)
+
+
+def current_month():
+    return datetime.now().strftime("%Y-%m")
+
+
+class BudgetEngine:
+    def __init__(self, store=None):
+        self.store = store
+        self.budgets = store.load_budgets() if store is not None else {}
+        self.spent = defaultdict(Decimal)  # (ym, scope) -> spent
+        self.month = current_month()
+        self.alerts = deque(maxlen=50)
+        self._levels = {}  # scope -> آخرین آستانهٔ ردشده در ماه جاری
+        if store is not None:
+            self.reload()
+
+    def reload(self):
+        # فقط هنگام شروع یا پس از ورود گروهی؛ GROUP BY در دیتابیس
+        self.spent.clear()
+        for r in self.store.month_category_expenses():
+            amount = from_cents(r["expense"])
+            self.spent[(r["ym"], r["category"])] += amount
+            self.spent[(r["ym"], "")] += amount
+        self._reset_levels()
+
+    def load_transactions(self, transactions):
+        self.spent.clear()
+        for tr in transactions:
+            self._count(tr, 1)
+        self._reset_levels()
+
+    def _count(self, tr, sign):
+        amount = tr.amount
+        if amount >= 0:
+            return None
+        ym = tr.ym
+        self.spent[(ym, tr.category)] -= sign * amount
+        self.spent[(ym, "")] -= sign * amount
+        return ym
+
+    def apply(self, removed, added):
+        touched = set()
+        for tr, sign in [(t, -1) for t in removed] + [(t, 1) for t in added]:
+            if self._count(tr, sign) == self.month:
+                touched.update(("", tr.category))
+        for scope in touched:
+            self._check(scope)
+
+    def roll_month(self):
+        # تغییر ماه: شمارندهٔ ماه جدید از قبل موجود است، فقط آستانه‌ها از نو
+        month = current_month()
+        if month == self.month:
+            return False
+        self.month = month
+        self._reset_levels()
+        return True
+
+    def budget_for(self, scope, ym=None):
+        ym = ym or self.month
+        return self.budgets.get((scope, ym)) or self.budgets.get((scope, ""))
+
+    def set_budget(self, amount, scope="", month=""):
+        self.budgets[(scope, month)] = amount
+        if self.store is not None:
+            self.store.save_budget(scope, month, amount)
+        self._check(scope)
+
+    def scopes(self):
+        return sorted({scope for scope, _ in self.budgets})
+
+    def status(self, scope=""):
+        budget = self.budget_for(scope) or Decimal("0")
+        spent = self.spent.get((self.month, scope), Decimal("0"))
+        pct = float(spent / budget * 100) if budget > 0 else 0.0
+        return budget, spent, pct
+
+    def _level(self, scope):
+        pct = self.status(scope)[2]
+        return max((t for t in BUDGET_THRESHOLDS if pct >= t), default=0)
+
+    def _reset_levels(self):
+        self._levels = {}
+        for scope in self.scopes():
+            self._check(scope)
+
+    def _check(self, scope):
+        # پیام فقط وقتی ساخته می‌شود که سطح آستانه عوض شود
+        if self.budget_for(scope) is None:
+            return
+        level = self._level(scope)
+        if level == self._levels.get(scope, 0):
+            return
+        self._levels[scope] = level
+        self.alerts.appendleft(budget_alert(scope, level))
+
+
+def budget_alert(scope, level):
+    what = f"{scope} budget" if scope else "monthly budget"
+    if level >= 100:
+        return f"• ALERT: You have exceeded your {what}!"
+    if level >= 90:
+        return f"• WARNING: You have used 90% of your {what}."
+    if level >= 75:
+        return f"• NOTICE: You have used 75% of your {what}."
+    if level >= 50:
+        return f"• Heads-up: 50% of your {what} is used."
+    return f"• Back under 50% of your {what}."
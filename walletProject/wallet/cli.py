@@ -0,0 +1,190 @@
+import argparse
+import gzip
+import json
+import os
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+
+from .aggregates import LedgerAggregates
+from .budget import BudgetEngine
+from .config import CURRENCY, EPOCH_ORDINAL, IMPORT_BATCH
+from .io import batches, import_file, parse_records, read_csv_records
+from .io import read_ofx_records, write_csv
+from .store import LedgerStore
+from .timeutil import RANGES, range_bounds
+
+# python -m wallet report ledger.db --range "This year"
+# python -m wallet report export.csv.gz --from 2024-01-01 --to 2024-12-31 --json
+
+
+def read_aggregates(path):
+    # فایل CSV/OFX به‌صورت جریانی جمع زده می‌شود؛ ردیف‌ها نگه داشته نمی‌شوند
+    opener = gzip.open if path.endswith(".gz") else open
+    is_ofx = path.lower().endswith((".ofx", ".qfx", ".ofx.gz", ".qfx.gz"))
+    agg = LedgerAggregates()
+    invalid = 0
+    with opener(path, "rt", newline="", encoding="utf-8-sig") as f:
+        records = read_ofx_records(f) if is_ofx else read_csv_records(f)
+        for raw in batches(records, IMPORT_BATCH):
+            for tr in parse_records(raw):
+                if tr is None:
+                    invalid += 1
+                else:
+                    agg.add(tr)
+    return agg, invalid
+
+
+def _bounds(args):
+    # --from/--to بر --range مقدم است؛ پایان پیش‌فرض امروز
+    if args.date_from or args.date_to:
+        first = _parse_day(args.date_from) if args.date_from else date(1970, 1, 1)
+        last = _parse_day(args.date_to) if args.date_to else date.today()
+        return first.toordinal() - EPOCH_ORDINAL, last.toordinal() - EPOCH_ORDINAL
+    return range_bounds(args.range)
+
+
+def _open_existing(path):
+    # LedgerStore فایل نبوده را می‌سازد؛ فقط import حق ساختن دیتابیس تازه دارد
+    if not os.path.isfile(path):
+        raise SystemExit(f"wallet: no such database: {path}")
+    return LedgerStore(path)
+
+
+def _parse_day(text):
+    try:
+        return datetime.strptime(text, "%Y-%m-%d").date()
+    except ValueError:
+        raise SystemExit(f"wallet: invalid date {text!r}, expected YYYY-MM-DD")
+
+
+def build_report(agg, bounds):
+    snap = agg.snapshot(bounds)
+    if bounds is None:
+        # همهٔ ماه‌ها، نه فقط ستون‌های نمودار
+        periods = [
+            (m, agg.inc_by_month.get(m, 0), agg.exp_by_month.get(m, 0))
+            for m in agg.months()
+        ]
+    else:
+        periods = snap["buckets"]
+    return {
+        "transactions": snap["count"],
+        "income": snap["income"],
+        "expense": snap["expense"],
+        "net": snap["income"] - snap["expense"],
+        "avg_monthly_expense": snap["avg"].quantize(Decimal("0.01")),
+        "largest_expense": snap["largest"],
+        "categories": dict(
+            sorted(snap["exp_by_cat"].items(), key=lambda kv: kv[1], reverse=True)
+        ),
+        "periods": [list(p) for p in periods],
+    }
+
+
+def print_report(report, out=sys.stdout):
+    money = lambda v: f"{CURRENCY}{v:,.2f}"
+    for key in ("income", "expense", "net", "avg_monthly_expense", "largest_expense"):
+        print(
+            f"{key.replace('_', ' ').capitalize():<22}{money(report[key]):>16}",
+            file=out,
+        )
+    print(f"{'Transactions':<22}{report['transactions']:>16,}", file=out)
+    print("\nExpenses by category", file=out)
+    for cat, value in report["categories"].items():
+        print(f"  {cat:<20}{money(value):>16}", file=out)
+    print(f"\n  {'Period':<20}{'Income':>16}{'Expense':>16}", file=out)
+    for label, inc, exp in report["periods"]:
+        print(f"  {label:<20}{money(inc):>16}{money(exp):>16}", file=out)
+
+
+def cmd_report(args):
+    bounds = _bounds(args)
+    invalid = 0
+    if args.source.endswith(".db"):
+        # جمع‌ها از rollupها؛ بازه‌ها هم از دیتابیس، پس اتصال تا پایان باز می‌ماند
+        store = _open_existing(args.source)
+        try:
+            report = build_report(LedgerAggregates.from_store(store), bounds)
+        finally:
+            store.close()
+    else:
+        agg, invalid = read_aggregates(args.source)
+        report = build_report(agg, bounds)
+    if invalid:
+        report["invalid_rows"] = invalid
+    if args.json:
+        json.dump(report, sys.stdout, indent=2, default=str)
+        print()
+    else:
+        print_report(report)
+        if invalid:
+            print(f"\nInvalid rows skipped: {invalid:,}")
+
+
+def cmd_budget(args):
+    store = _open_existing(args.db)
+    try:
+        engine = BudgetEngine(store)
+        if not engine.budgets:
+            print("No budgets set.")
+        for scope in engine.scopes():
+            budget, spent, pct = engine.status(scope)
+            print(
+                f"{scope or 'All categories':<20}{CURRENCY}{spent:>12,.2f} of"
+                f" {CURRENCY}{budget:,.2f} ({pct:.1f}%)"
+            )
+    finally:
+        store.close()
+
+
+def cmd_import(args):
+    store = LedgerStore(args.db)
+    try:
+        imported, duplicates, invalid = import_file(store, args.file)
+    finally:
+        store.close()
+    print(f"Imported: {imported:,}  Duplicates: {duplicates:,}  Invalid: {invalid:,}")
+
+
+def cmd_export(args):
+    store = _open_existing(args.db)
+    try:
+        written = write_csv(store, args.out)
+    finally:
+        store.close()
+    print(f"Exported {written:,} transactions to {args.out}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="wallet", description="Personal wallet")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("report", help="totals, categories and periods")
+    p.add_argument("source", help="wallet .db or exported .csv/.csv.gz/.ofx")
+    p.add_argument("--range", choices=RANGES[:-1], default=RANGES[0])
+    p.add_argument("--from", dest="date_from", help="YYYY-MM-DD")
+    p.add_argument("--to", dest="date_to", help="YYYY-MM-DD")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("budget", help="this month's budget status")
+    p.add_argument("db")
+    p.set_defaults(func=cmd_budget)
+
+    p = sub.add_parser("import", help="bulk import a CSV or OFX file")
+    p.add_argument("db")
+    p.add_argument("file")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", help="export all transactions to CSV")
+    p.add_argument("db")
+    p.add_argument("out", help=".csv or .csv.gz")
+    p.set_defaults(func=cmd_export)
+
+    args = parser.parse_args(argv)
+    try:
+        args.func(args)
+    except (OSError, ValueError) as e:
+        # فایل ورودی نبوده یا نامعتبر (مثلاً ستون‌های ناقص) بدون traceback
+        raise SystemExit(f"wallet: {e}")
@@ -0,0 +1,142 @@
+from .money import from_cents, to_cents
+from .timeutil import day_to_date
+
+_DAY_SHIFT = 1 << 40  # کلید یکتای (روز، سنت) در یک int64
+
+# NumPy فقط وقتی لازم شود import می‌شود (شروع سریع‌تر)
+np = None
+_numpy_missing = False
+
+
+def load_numpy():
+    # ذخیره‌سازی ستونی اختیاری است؛ بدون NumPy None برمی‌گرداند
+    global np, _numpy_missing
+    if np is None and not _numpy_missing:
+        try:
+            import numpy
+        except ImportError:
+            _numpy_missing = True
+            return None
+        np = numpy
+    return np
+
+
+# سنت int64، روز int32 و کد دسته int16؛ تجمیع‌ها برداری و با جمع صحیح (دقیق)
+class ColumnarLedger:
+    def __init__(self, capacity=1024):
+        load_numpy()
+        self.size = 0
+        self.cents = np.zeros(capacity, dtype=np.int64)
+        self.days = np.zeros(capacity, dtype=np.int32)
+        self.cats = np.zeros(capacity, dtype=np.int16)
+        self.categories = []  # code -> name
+        self._cat_codes = {}
+
+    def _grow(self):
+        capacity = len(self.cents) * 2
+        for name in ("cents", "days", "cats"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: self.size] = old[: self.size]
+            setattr(self, name, new)
+
+    def _code(self, category):
+        code = self._cat_codes.get(category)
+        if code is None:
+            code = self._cat_codes[category] = len(self.categories)
+            self.categories.append(category)
+        return code
+
+    def append(self, tr):
+        if self.size == len(self.cents):
+            self._grow()
+        i = self.size
+        self.cents[i] = to_cents(tr.amount)
+        self.days[i] = tr.day
+        self.cats[i] = self._code(tr.category)
+        self.size += 1
+
+    def extend(self, transactions):
+        for t in transactions:
+            self.append(t)
+
+    def _months(self):
+        # ماه از 1970-01
+        days = self.days[: self.size].astype("datetime64[D]")
+        return days.astype("datetime64[M]").astype(np.int64)
+
+    def month_totals(self):
+        cents = self.cents[: self.size]
+        keys, inv = np.unique(self._months(), return_inverse=True)
+        income = np.zeros(len(keys), dtype=np.int64)
+        expense = np.zeros(len(keys), dtype=np.int64)
+        np.add.at(income, inv, np.where(cents >= 0, cents, 0))
+        np.add.at(expense, inv, np.where(cents < 0, -cents, 0))
+        n = np.bincount(inv, minlength=len(keys))
+        n_exp = np.bincount(inv[cents < 0], minlength=len(keys))
+        return [
+            {
+                "ym": f"{1970 + int(m) // 12}-{int(m) % 12 + 1:02d}",
+                "income": int(income[k]),
+                "expense": int(expense[k]),
+                "n": int(n[k]),
+                "n_exp": int(n_exp[k]),
+            }
+            for k, m in enumerate(keys)
+        ]
+
+    def category_expenses(self):
+        cents = self.cents[: self.size]
+        mask = cents < 0
+        codes = self.cats[: self.size][mask]
+        sums = np.zeros(len(self.categories), dtype=np.int64)
+        np.add.at(sums, codes, -cents[mask])
+        n = np.bincount(codes, minlength=len(self.categories))
+        return [
+            {"category": name, "expense": int(sums[c]), "n": int(n[c])}
+            for c, name in enumerate(self.categories)
+            if n[c]
+        ]
+
+    def day_totals(self):
+        cents = self.cents[: self.size]
+        keys, inv = np.unique(
+            self.days[: self.size].astype(np.int64) * 65536 + self.cats[: self.size],
+            return_inverse=True,
+        )
+        income = np.zeros(len(keys), dtype=np.int64)
+        expense = np.zeros(len(keys), dtype=np.int64)
+        np.add.at(income, inv, np.where(cents >= 0, cents, 0))
+        np.add.at(expense, inv, np.where(cents < 0, -cents, 0))
+        n = np.bincount(inv, minlength=len(keys))
+        n_exp = np.bincount(inv[cents < 0], minlength=len(keys))
+        return [
+            {
+                "day": day_to_date(int(key) >> 16).isoformat(),
+                "category": self.categories[int(key) & 0xFFFF],
+                "income": int(income[k]),
+                "expense": int(expense[k]),
+                "n": int(n[k]),
+                "n_exp": int(n_exp[k]),
+            }
+            for k, key in enumerate(keys)
+        ]
+
+    def day_expenses(self):
+        # (روز، مبلغ هزینه، تعداد)؛ هر مبلغ یکتا فقط یک بار Decimal می‌شود
+        cents = self.cents[: self.size]
+        mask = cents < 0
+        keys, n = np.unique(
+            self.days[: self.size][mask].astype(np.int64) * _DAY_SHIFT - cents[mask],
+            return_counts=True,
+        )
+        days, exps = np.divmod(keys, _DAY_SHIFT)
+        amounts, inv = np.unique(exps, return_inverse=True)
+        amounts = [from_cents(c) for c in amounts.tolist()]
+        return zip(days.tolist(), [amounts[i] for i in inv.tolist()], n.tolist())
+
+    def largest_expenses(self, limit):
+        exp = -self.cents[: self.size][self.cents[: self.size] < 0]
+        if len(exp) > limit:
+            exp = np.partition(exp, len(exp) - limit)[-limit:]
+        return [from_cents(int(c)) for c in np.sort(exp)[::-1]]
@@ -0,0 +1,36 @@
+import os
+from datetime import date
+
+CURRENCY = "$"
+BASE_CURRENCY = "USD"  # جمع‌ها، بودجه و نمودارها به این ارز
+DEFAULT_ACCOUNT = "Main"
+CURRENCY_SYMBOLS = {"USD": "$", "EUR": "€", "GBP": "£", "JPY": "¥", "IRR": "﷼"}
+DATE_FMT = "%Y-%m-%d %H:%M"
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+DB_PATH = os.environ.get("WALLET_DB") or os.path.join(
+    os.path.expanduser("~"), ".personal_wallet", "wallet.db"
+)
+EXPORT_CHUNK = 2000  # ردیف‌ها در هر نوبت نوشتن/گزارش پیشرفت خروجی
+IMPORT_BATCH = 1000  # ردیف‌ها در هر دستهٔ اعتبارسنجی/درج هنگام ورود
+COLUMNAR_MIN_ROWS = 20000  # از این تعداد به بعد تجمیع با NumPy انجام می‌شود
+HEAP_SEED = 256  # بزرگ‌ترین هزینه‌هایی که از دیتابیس برای heap خوانده می‌شوند
+
+RECENT_MONTHS = 6  # ستون‌های نمودار در حالت All time
+MAX_BUCKETS = 12  # حداکثر ستون‌های نمودار برای یک بازه
+
+CATEGORY_MAP = {
+    "income": ["Salary", "Bonus", "Investment", "Gift", "Other"],
+    "expense": [
+        "Food",
+        "Bills",
+        "Rent",
+        "Transportation",
+        "Healthcare",
+        "Shopping",
+        "Entertainment",
+        "Education",
+        "Travel",
+        "Other",
+    ],
+}
+ALL_CATEGORIES = sorted(set(CATEGORY_MAP["income"] + CATEGORY_MAP["expense"]))
@@ -0,0 +1,63 @@
+import queue
+import threading
+import traceback
+from collections import namedtuple
+
+# رویدادهای تغییر دفتر همراه با دلتا؛ مشترک‌ها به‌جای لیست کامل فقط تغییر را می‌گیرند
+TX_ADDED = "added"
+TX_REMOVED = "removed"
+TX_UPDATED = "updated"
+TX_CLEARED = "cleared"
+TX_RELOADED = "reloaded"  # شروع برنامه یا خطای ورود؛ مشترک باید از نو بسازد
+
+LedgerEvent = namedtuple("LedgerEvent", "kind removed added aggregates")
+
+
+def classify_delta(removed, added):
+    if removed and added:
+        return TX_UPDATED
+    return TX_REMOVED if removed else TX_ADDED
+
+
+class EventBus:
+    def __init__(self):
+        self._subscribers = []
+        self._workers = []
+
+    def subscribe(self, callback, kinds=None, threaded=False):
+        # threaded=True: callback در نخ جدا اجرا می‌شود و نباید مستقیم به Tk دست بزند
+        kinds = frozenset(kinds) if kinds else None
+        if threaded:
+            inbox = queue.Queue()
+            worker = threading.Thread(
+                target=self._drain, args=(inbox, callback), daemon=True
+            )
+            worker.start()
+            self._workers.append((inbox, worker))
+            callback = inbox.put
+        self._subscribers.append((kinds, callback))
+
+    def publish(self, kind, removed=(), added=(), aggregates=None):
+        event = LedgerEvent(kind, tuple(removed), tuple(added), aggregates)
+        for kinds, callback in self._subscribers:
+            if kinds is None or kind in kinds:
+                callback(event)
+        return event
+
+    @staticmethod
+    def _drain(inbox, callback):
+        while True:
+            event = inbox.get()
+            if event is None:
+                return
+            try:
+                callback(event)
+            except Exception:
+                traceback.print_exc()
+
+    def close(self):
+        for inbox, _ in self._workers:
+            inbox.put(None)
+        for _, worker in self._workers:
+            worker.join(timeout=1)
+        self._workers.clear()
@@ -0,0 +1,58 @@
+import bisect
+from collections import defaultdict
+from decimal import Decimal
+
+from .config import BASE_CURRENCY
+from .money import from_cents, to_cents
+from .timeutil import day_number, parse_ts
+
+
+class FxRates:
+    # نرخ تبدیل هر ارز به ارز پایه؛ برای هر روز آخرین نرخِ همان روز یا قبل از آن
+    def __init__(self, store=None):
+        self.store = store
+        self._series = {}  # currency -> (days, rates) مرتب
+        self._cache = {}  # (currency, day) -> rate
+        if store is not None:
+            self.reload()
+
+    def reload(self):
+        series = defaultdict(list)
+        for r in self.store.load_rates():
+            series[r["currency"]].append((day_number(r["day"]), Decimal(r["rate"])))
+        self._series = {}
+        for currency, points in series.items():
+            points.sort()
+            self._series[currency] = ([d for d, _ in points], [x for _, x in points])
+        self._cache.clear()
+
+    def set_rates(self, rows):
+        # rows: (currency, YYYY-MM-DD, rate)؛ ارزهای تغییرکرده برگردانده می‌شوند
+        rows = list(rows)
+        self.store.save_rates([(c, d, str(r)) for c, d, r in rows])
+        self.reload()
+        return {c for c, _, _ in rows}
+
+    def currencies(self):
+        return [BASE_CURRENCY] + sorted(set(self._series) - {BASE_CURRENCY})
+
+    def rate(self, currency, day):
+        if currency == BASE_CURRENCY:
+            return Decimal("1")
+        key = (currency, day)
+        rate = self._cache.get(key)
+        if rate is None:
+            series = self._series.get(currency)
+            if not series:
+                raise ValueError(f"no exchange rate for {currency}")
+            days, rates = series
+            # قبل از اولین نرخ، همان اولین نرخ
+            i = max(bisect.bisect_right(days, day) - 1, 0)
+            rate = self._cache[key] = rates[i]
+        return rate
+
+    def to_base(self, amount, currency, dt_str):
+        if currency == BASE_CURRENCY:
+            return amount
+        rate = self.rate(currency, parse_ts(dt_str) // 1440)
+        return from_cents(to_cents(amount * rate))
@@ -0,0 +1,275 @@
+import csv
+import gzip
+import os
+import re
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal
+
+from .config import (
+    ALL_CATEGORIES,
+    BASE_CURRENCY,
+    DATE_FMT,
+    DEFAULT_ACCOUNT,
+    IMPORT_BATCH,
+)
+from .fx import FxRates
+from .money import Money, parse_amount, round_cents, to_cents
+from .timeutil import is_fixed_format, parse_ts
+from .transaction import make_transaction
+
+# ---------------------- CSV Export ----------------------
+EXPORT_HEADER = [
+    "#",
+    "Amount",
+    "Type",
+    "Category",
+    "Description",
+    "Date",
+    "Account",
+    "Currency",
+    "Original Amount",
+]
+
+
+def write_csv(store, path, progress=None, cancel=None):
+    # در فایل موقت نوشته می‌شود و فقط در پایان موفق جایگزین مقصد می‌شود
+    tmp = path + ".part"
+    opener = gzip.open if path.endswith(".gz") else open
+    conn = store.reader()
+    written = 0
+    try:
+        with opener(tmp, "wt", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_HEADER)
+            for chunk in store.iter_chunks(conn):
+                if cancel is not None and cancel.is_set():
+                    break
+                writer.writerows(
+                    (r[0], f"{Money(r[1])}", *r[2:8], f"{Money(r[8])}") for r in chunk
+                )
+                written += len(chunk)
+                if progress:
+                    progress(written)
+        if cancel is not None and cancel.is_set():
+            os.remove(tmp)
+            return None
+        os.replace(tmp, path)
+    except BaseException:
+        # فایل نیمه‌کاره نباید کنار مقصد بماند
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    finally:
+        conn.close()
+    return written
+
+
+# ---------------------- Bulk Import ----------------------
+IMPORT_DATE_FORMATS = ("%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d")
+OFX_TAG = re.compile(r"<(/?\w+)>([^<\r\n]*)")
+
+
+def normalize_date(text: str) -> str:
+    text = text.strip()
+    if is_fixed_format(text):
+        parse_ts(text)  # فقط اعتبارسنجی
+        return text
+    for fmt in IMPORT_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime(DATE_FMT)
+        except ValueError:
+            continue
+    raise ValueError(f"bad date: {text!r}")
+
+
+def _columns(header, required):
+    # نام ستون -> اندیس؛ نبود ستون‌های لازم با پیام روشن
+    cols = {name.strip().lower(): i for i, name in enumerate(header)}
+    missing = [c for c in required if c not in cols]
+    if missing:
+        raise ValueError(f"missing CSV column(s): {', '.join(missing)}")
+    return cols
+
+
+def read_csv_records(f):
+    # همان ستون‌های خروجی؛ ستون # و Type نادیده گرفته می‌شوند
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+    cols = _columns(header, ("amount", "category", "description", "date"))
+    idx = [cols[c] for c in ("amount", "category", "description", "date")]
+    # ستون‌های حساب و ارز اختیاری‌اند (فایل‌های قدیمی‌تر)
+    idx += [cols.get(c) for c in ("account", "currency", "original amount")]
+    for row in reader:
+        if row:
+            yield (
+                *(row[i] if i is not None and i < len(row) else "" for i in idx),
+                "",
+            )
+
+
+def read_ofx_records(f):
+    # پیمایش خط‌به‌خط بلوک‌های STMTTRN (SGML یا XML)؛ FITID فقط در یک حساب
+    # یکتاست، پس با ACCTID همان statement کلید می‌شود
+    current = None
+    account_id = currency = ""
+    for line in f:
+        for tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "ACCTID" and current is None:
+                account_id = value.strip()
+            elif tag == "CURDEF" and current is None:
+                currency = value.strip()
+            elif tag == "STMTTRN":
+                current = {}
+            elif tag == "/STMTTRN" and current is not None:
+                posted = current.get("DTPOSTED", "")
+                dt_str = f"{posted[0:4]}-{posted[4:6]}-{posted[6:8]}"
+                if len(posted) >= 12:
+                    dt_str += f" {posted[8:10]}:{posted[10:12]}"
+                desc = current.get("NAME") or current.get("MEMO", "")
+                fitid = current.get("FITID", "")
+                yield (
+                    current.get("TRNAMT", ""),
+                    "Other",
+                    desc,
+                    dt_str,
+                    "",
+                    currency,
+                    "",
+                    f"{account_id}:{fitid}" if fitid else "",
+                )
+                current = None
+            elif current is not None and value.strip():
+                current[tag] = value.strip()
+
+
+def parse_records(records, fx=None, accounts=None):
+    # (amount, category, description, date, account, currency, original, fitid)
+    # -> Transaction؛ ردیف نامعتبر None. با ستون Original Amount، amount همان
+    # مبلغ به ارز پایه است؛ بدون آن amount به ارز ردیف است و با fx تبدیل می‌شود
+    # accounts (نام -> ارز) حساب‌های تازهٔ فایل را هم ثبت می‌کند؛ ردیفی که ارزش با
+    # ارز حساب نمی‌خواند به حساب «نام ارز» می‌رود
+    if accounts is None:
+        accounts = {}
+    parsed = []
+    for amount_text, category, desc, dt_str, account, currency, orig, _ in records:
+        account = account.strip() or DEFAULT_ACCOUNT
+        currency = currency.strip().upper() or accounts.get(account, BASE_CURRENCY)
+        if accounts.get(account, currency) != currency:
+            account = f"{account} {currency}"
+            if accounts.get(account, currency) != currency:
+                parsed.append(None)
+                continue
+        try:
+            amount = round_cents(parse_amount(amount_text))
+            orig = round_cents(parse_amount(orig)) if orig.strip() else None
+            dt_str = normalize_date(dt_str)
+            if orig is None and currency != BASE_CURRENCY:
+                if fx is None:
+                    raise ValueError(f"no exchange rate for {currency}")
+                orig, amount = amount, fx.to_base(amount, currency, dt_str)
+        except ValueError:
+            parsed.append(None)
+            continue
+        accounts.setdefault(account, currency)
+        category = category.strip()
+        if category not in ALL_CATEGORIES:
+            category = "Other"
+        parsed.append(
+            make_transaction(
+                amount,
+                category,
+                desc.strip(),
+                dt_str,
+                account=account,
+                currency=currency,
+                orig_amount=orig,
+            )
+        )
+    return parsed
+
+
+def read_rate_records(f):
+    # CSV با ستون‌های currency, date, rate (یک واحد ارز = rate واحد ارز پایه)
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+    cols = _columns(header, ("currency", "date", "rate"))
+    idx = [cols[c] for c in ("currency", "date", "rate")]
+    for row in reader:
+        if not row:
+            continue
+        currency, day, rate = (row[i].strip() for i in idx)
+        rate = Decimal(rate)
+        if rate <= 0:
+            raise ValueError(f"bad rate: {rate}")
+        day = datetime.strptime(day[:10], "%Y-%m-%d").date().isoformat()
+        yield currency.upper(), day, rate
+
+
+def batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_file(store, path, on_batch=None, fx=None):
+    # کل فایل در یک تراکنش دیتابیس؛ در صورت خطا هیچ ردیفی ثبت نمی‌شود
+    if fx is None:
+        fx = FxRates(store)
+    accounts = store.accounts()
+    opener = gzip.open if path.endswith(".gz") else open
+    is_ofx = path.lower().endswith((".ofx", ".qfx", ".ofx.gz", ".qfx.gz"))
+    # تکرار فقط نسبت به ردیف‌هایی که پیش از این ورود در دیتابیس بوده‌اند: هر ردیف
+    # قبلی با حداکثر یک ردیف فایل جفت می‌شود، پس دو خرید یکسان در یک روز هر دو
+    # ثبت می‌شوند و ورود دوبارهٔ همان فایل چیزی اضافه نمی‌کند. OFX با FITID
+    imported = duplicates = invalid = 0
+    added = Counter()  # کلیدهای ثبت‌شده در همین ورود (در دیتابیس هم دیده می‌شوند)
+    matched = Counter()  # ردیف‌های قبلی دیتابیس که با ردیفی از فایل جفت شده‌اند
+    with opener(path, "rt", newline="", encoding="utf-8-sig") as f, store.conn:
+        records = read_ofx_records(f) if is_ofx else read_csv_records(f)
+        for raw in batches(records, IMPORT_BATCH):
+            batch, fitids = [], []
+            parsed = [
+                (t, rec[7])
+                for rec, t in zip(raw, parse_records(raw, fx, accounts))
+                if t is not None
+            ]
+            invalid += len(raw) - len(parsed)
+            if not parsed:
+                continue
+            dates = [t.date for t, _ in parsed]
+            existing = store.existing_counts(min(dates), max(dates))
+            known = store.known_fitids(fid for _, fid in parsed if fid)
+            for t, fitid in parsed:
+                if fitid:
+                    if fitid in known:
+                        duplicates += 1
+                        continue
+                    known.add(fitid)
+                    fitids.append(fitid)
+                else:
+                    key = (t.date, to_cents(t.amount), t.category, t.description)
+                    if matched[key] < existing[key] - added[key]:
+                        matched[key] += 1
+                        duplicates += 1
+                        continue
+                    added[key] += 1
+                batch.append(t)
+            if batch:
+                store.ensure_accounts({(t.account, t.currency) for t in batch})
+                store.insert_batch(batch, fitids)
+                imported += len(batch)
+                if on_batch:
+                    on_batch(batch)
+    store.optimize()
+    return imported, duplicates, invalid
@@ -0,0 +1,219 @@
+from array import array
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from .config import BASE_CURRENCY, CURRENCY, CURRENCY_SYMBOLS
+
+_CENT = Decimal("0.01")
+_FAST_SPECS = {"": "", ".2f": "", ",.2f": ",", "+.2f": "+", "+,.2f": "+,"}
+_SYMBOLS = CURRENCY_SYMBOLS
+
+
+class Money:
+    # مبلغ ثابت‌ممیز با سنت صحیح؛ بدون خطای float و بدون هزینهٔ Decimal
+    __slots__ = ("cents",)
+
+    def __init__(self, cents=0):
+        self.cents = cents
+
+    @classmethod
+    def parse(cls, text: str) -> "Money":
+        # "$1,234.5" / "-12" / "12-" ؛ بیش از دو رقم اعشار گرد می‌شود (نیم به بالا)
+        clean = text.strip().replace(CURRENCY, "").replace(",", "")
+        if clean.endswith("-"):
+            clean = "-" + clean[:-1]
+        units, _, frac = clean.partition(".")
+        if (
+            "_" in clean
+            or (frac and not frac.isdigit())
+            or not units.strip("+-") + frac
+        ):
+            raise ValueError(f"invalid amount: {text!r}")
+        # رشتهٔ سنت با یک int() در C خوانده می‌شود
+        cents = int(units + (frac + "00")[:2])
+        if len(frac) > 2 and frac[2] >= "5":
+            cents += -1 if clean.startswith("-") else 1
+        return cls(cents)
+
+    @classmethod
+    def sum(cls, values) -> "Money":
+        return cls(sum(m.cents for m in values))
+
+    @classmethod
+    def of(cls, value) -> "Money":
+        # Money، Decimal، متن یا عدد بر حسب واحد (نه سنت)
+        if isinstance(value, Money):
+            return value
+        if isinstance(value, str):
+            return cls.parse(value)
+        if isinstance(value, Decimal):
+            return cls.from_decimal(value)
+        return cls(int(round(value * 100)))
+
+    @classmethod
+    def from_decimal(cls, amount: Decimal) -> "Money":
+        return cls(int((amount * 100).to_integral_value(ROUND_HALF_UP)))
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(self.cents).scaleb(-2)
+
+    def format(self, currency=BASE_CURRENCY, sign=True) -> str:
+        # cents/100 تا 15 رقم معنادار دقیقاً به همان دو رقم اعشار گرد می‌شود
+        symbol = _SYMBOLS.get(currency) or f"{currency} "
+        if self.cents < 0:
+            return f"-{symbol}{-self.cents / 100:,.2f}"
+        return f"{'+' if sign else ''}{symbol}{self.cents / 100:,.2f}"
+
+    def __format__(self, spec):
+        flags = _FAST_SPECS.get(spec)
+        if flags is None:
+            return format(self.to_decimal(), spec)
+        return format(self.cents / 100, flags + ".2f")
+
+    def __str__(self):
+        return format(self, "")
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+    def __add__(self, other):
+        if isinstance(other, Money):
+            return Money(self.cents + other.cents)
+        return NotImplemented
+
+    def __radd__(self, other):
+        # sum() با شروع از 0
+        if other == 0:
+            return self
+        return NotImplemented
+
+    def __sub__(self, other):
+        if isinstance(other, Money):
+            return Money(self.cents - other.cents)
+        return NotImplemented
+
+    def __mul__(self, factor):
+        if isinstance(factor, int):
+            return Money(self.cents * factor)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money(-self.cents)
+
+    def __abs__(self):
+        return Money(abs(self.cents))
+
+    def __bool__(self):
+        return self.cents != 0
+
+    def __eq__(self, other):
+        return isinstance(other, Money) and self.cents == other.cents
+
+    def __hash__(self):
+        return hash(self.cents)
+
+    def __lt__(self, other):
+        if isinstance(other, Money):
+            return self.cents < other.cents
+        return NotImplemented
+
+    def __le__(self, other):
+        if isinstance(other, Money):
+            return self.cents <= other.cents
+        return NotImplemented
+
+    def __gt__(self, other):
+        if isinstance(other, Money):
+            return self.cents > other.cents
+        return NotImplemented
+
+    def __ge__(self, other):
+        if isinstance(other, Money):
+            return self.cents >= other.cents
+        return NotImplemented
+
+
+class MoneyArray:
+    # ستون سنت‌ها در array('q') برای جمع‌های حجیم؛ با NumPy بدون کپی برداری می‌شود
+    __slots__ = ("cents",)
+
+    def __init__(self, values=()):
+        self.cents = array("q", (Money.of(v).cents for v in values))
+
+    def append(self, money):
+        self.cents.append(money.cents)
+
+    def __len__(self):
+        return len(self.cents)
+
+    def __getitem__(self, i):
+        return Money(self.cents[i])
+
+    def __iter__(self):
+        return map(Money, self.cents)
+
+    def to_numpy(self):
+        from .columnar import load_numpy
+
+        np = load_numpy()
+        if np is None or not self.cents:
+            return None
+        return np.frombuffer(self.cents, dtype=np.int64)
+
+    def total(self) -> Money:
+        return Money(sum(self.cents))
+
+    def split_total(self):
+        # (درآمد، هزینه) هر دو مثبت
+        vec = self.to_numpy()
+        if vec is not None:
+            income = int(vec[vec > 0].sum())
+            return Money(income), Money(income - int(vec.sum()))
+        income = sum(c for c in self.cents if c > 0)
+        return Money(income), Money(income - sum(self.cents))
+
+    def group_total(self, keys):
+        # keys هم‌طول با ستون؛ جمع سنت‌ها به‌ازای هر کلید
+        sums = {}
+        for key, cents in zip(keys, self.cents):
+            sums[key] = sums.get(key, 0) + cents
+        return {key: Money(cents) for key, cents in sums.items()}
+
+
+def fmt_amount(amount, currency=BASE_CURRENCY) -> str:
+    # Money یا Decimal؛ Decimal (ردیف‌های جدول) مستقیم قالب‌بندی می‌شود، چون
+    # تبدیل به Money برای هر ردیف از خود Decimal.__format__ گران‌تر است
+    if isinstance(amount, Money):
+        return amount.format(currency)
+    sign = "+" if amount >= 0 else "-"
+    symbol = _SYMBOLS.get(currency) or f"{currency} "
+    return f"{sign}{symbol}{abs(amount):,.2f}"
+
+
+def parse_amount(text: str) -> Decimal:
+    # مسیر ورود فرم و فایل؛ Decimal(clean) در C سریع‌تر از Money.parse است و
+    # گرد کردن به سنت جداگانه با round_cents است
+    clean = text.strip().replace(CURRENCY, "").replace(",", "")
+    if clean.endswith("-"):
+        clean = "-" + clean[:-1]
+    try:
+        amount = Decimal(clean)
+    except InvalidOperation:
+        raise ValueError(f"invalid amount: {text!r}") from None
+    if not amount.is_finite():
+        raise ValueError(f"invalid amount: {text!r}")
+    return amount
+
+
+def round_cents(amount: Decimal) -> Decimal:
+    # همان from_cents(to_cents(x)) با یک quantize
+    return amount.quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+def to_cents(amount: Decimal) -> int:
+    return int(amount.quantize(_CENT, rounding=ROUND_HALF_UP) * 100)
+
+
+def from_cents(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
@@ -0,0 +1,207 @@
+import heapq
+from calendar import monthrange
+from datetime import date, datetime
+
+from .config import DATE_FMT, EPOCH_ORDINAL
+from .money import from_cents, to_cents
+from .timeutil import day_to_date, format_ts, parse_ts
+from .transaction import Transaction
+
+MONTHLY = "monthly"
+WEEKLY = "weekly"
+FREQUENCIES = (MONTHLY, WEEKLY)
+
+
+class RecurringRule:
+    # amount به ارز حساب؛ anchor روز ماه برای monthly (در ماه کوتاه‌تر، آخر ماه)
+    __slots__ = (
+        "id",
+        "amount",
+        "category",
+        "description",
+        "account",
+        "currency",
+        "freq",
+        "every",
+        "anchor",
+        "next_ts",
+        "until_ts",
+    )
+
+    def __init__(
+        self,
+        amount,
+        category,
+        description,
+        account,
+        currency,
+        freq,
+        start_ts,
+        every=1,
+        anchor=None,
+        until_ts=None,
+        rule_id=None,
+    ):
+        if freq not in FREQUENCIES:
+            raise ValueError(f"unknown frequency: {freq}")
+        self.id = rule_id
+        self.amount = amount
+        self.category = category
+        self.description = description
+        self.account = account
+        self.currency = currency
+        self.freq = freq
+        self.every = max(1, every)
+        self.anchor = anchor or day_to_date(start_ts // 1440).day
+        self.next_ts = start_ts
+        self.until_ts = until_ts
+
+    @classmethod
+    def from_row(cls, r):
+        until = r["until"]
+        return cls(
+            from_cents(r["amount"]),
+            r["category"],
+            r["description"],
+            r["account"],
+            r["currency"],
+            r["freq"],
+            parse_ts(r["next_due"]),
+            r["every"],
+            r["anchor"],
+            None if until is None else parse_ts(until),
+            r["id"],
+        )
+
+    def params(self):
+        # به ترتیب RULE_COLUMNS در store
+        return (
+            to_cents(self.amount),
+            self.category,
+            self.description,
+            self.account,
+            self.currency,
+            self.freq,
+            self.every,
+            self.anchor,
+            format_ts(self.next_ts),
+            None if self.until_ts is None else format_ts(self.until_ts),
+        )
+
+    @property
+    def finished(self):
+        return self.until_ts is not None and self.next_ts > self.until_ts
+
+    def advance(self):
+        day, minute = divmod(self.next_ts, 1440)
+        if self.freq == WEEKLY:
+            self.next_ts += 7 * 1440 * self.every
+            return
+        d = day_to_date(day)
+        y, m = divmod(d.year * 12 + d.month - 1 + self.every, 12)
+        d = date(y, m + 1, min(self.anchor, monthrange(y, m + 1)[1]))
+        self.next_ts = (d.toordinal() - EPOCH_ORDINAL) * 1440 + minute
+
+    def occurrence(self, fx=None):
+        dt_str = format_ts(self.next_ts)
+        amount = (
+            self.amount
+            if fx is None
+            else fx.to_base(self.amount, self.currency, dt_str)
+        )
+        return Transaction(
+            amount,
+            self.category,
+            self.description,
+            self.next_ts,
+            account=self.account,
+            currency=self.currency,
+            orig_amount=self.amount,
+        )
+
+
+class RecurringScheduler:
+    # heap از (زمان سررسید بعدی، id قاعده)؛ قاعدهٔ حذف‌شده یا تغییرکرده با حذف
+    # تنبل کنار گذاشته می‌شود (ts در heap با next_ts قاعده نمی‌خواند)
+    def __init__(self, store, fx=None):
+        self.store = store
+        self.fx = fx
+        self.reload()
+
+    def reload(self):
+        self.rules = {}
+        # قواعدی که نرخ ارز ندارند بیرون heap می‌مانند تا retry()؛ وگرنه هر
+        # بررسی دوباره سررسید می‌شدند
+        self.blocked = {}
+        for r in self.store.load_rules():
+            rule = RecurringRule.from_row(r)
+            self.rules[rule.id] = rule
+        self._heap = [(r.next_ts, r.id) for r in self.rules.values() if not r.finished]
+        heapq.heapify(self._heap)
+
+    def add(self, rule):
+        rule.id = self.store.add_rule(rule.params())
+        self.rules[rule.id] = rule
+        heapq.heappush(self._heap, (rule.next_ts, rule.id))
+        return rule
+
+    def remove(self, rule_id):
+        self.store.delete_rule(rule_id)
+        self.rules.pop(rule_id, None)
+        self.blocked.pop(rule_id, None)
+
+    def retry(self):
+        # پس از ورود نرخ‌های تازه؛ قواعد معطل دوباره در صف قرار می‌گیرند
+        for rule in self.blocked.values():
+            heapq.heappush(self._heap, (rule.next_ts, rule.id))
+        self.blocked.clear()
+
+    def next_due(self):
+        heap = self._heap
+        while heap:
+            ts, rule_id = heap[0]
+            rule = self.rules.get(rule_id)
+            if rule is not None and rule.next_ts == ts:
+                return ts
+            heapq.heappop(heap)
+        return None
+
+    def _collect(self, now_ts):
+        # همهٔ سررسیدها تا now به ترتیب زمان؛ چند دورهٔ عقب‌افتاده یکجا
+        rows, touched = [], {}
+        heap = self._heap
+        while heap and heap[0][0] <= now_ts:
+            ts, rule_id = heapq.heappop(heap)
+            rule = self.rules.get(rule_id)
+            if rule is None or rule.next_ts != ts:
+                continue
+            try:
+                rows.append(rule.occurrence(self.fx))
+            except ValueError:
+                self.blocked[rule_id] = rule  # نرخ ارز ندارد
+                continue
+            rule.advance()
+            touched[rule_id] = rule
+            if not rule.finished:
+                heapq.heappush(heap, (rule.next_ts, rule_id))
+        return rows, touched
+
+    def materialize(self, now=None):
+        # ردیف‌ها و next_due قواعد در یک تراکنش دیتابیس؛ در خطا حالت از دیتابیس.
+        # (ردیف‌های ثبت‌شده، قواعدی که همین بار به خاطر نبود نرخ ارز معطل شدند)
+        due = self.next_due()
+        now_ts = parse_ts((now or datetime.now()).strftime(DATE_FMT))
+        if due is None or due > now_ts:
+            return [], []
+        blocked = set(self.blocked)
+        rows, touched = self._collect(now_ts)
+        if touched:
+            try:
+                self.store.add_recurring(
+                    rows, [(format_ts(r.next_ts), r.id) for r in touched.values()]
+                )
+            except Exception:
+                self.reload()
+                raise
+        skipped = [r for i, r in self.blocked.items() if i not in blocked]
+        return rows, skipped
@@ -0,0 +1,90 @@
+import re
+from datetime import date
+from decimal import Decimal
+
+from .config import ALL_CATEGORIES
+from .money import to_cents
+
+# مثال: "food, >1,000, last 3 months" ؛ بخش‌ها با کاما یا ; جدا می‌شوند (کامای
+# هزارگان مثل 1,000 جداکننده نیست). بخشی که هیچ الگویی نخورد، کلماتش در متن
+# جستجو می‌شوند؛ پس "food >100" دو کلمه است، نه دسته و مبلغ
+SEARCH_SPLIT = re.compile(r"[,;](?!(?<=\d,)\d{3}(?!\d))")
+SEARCH_AMOUNT = re.compile(
+    r"^(>=|<=|>|<|=)\s*\$?((?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?)$"
+)
+SEARCH_LAST = re.compile(r"^last\s+(\d+)\s+(day|week|month|year)s?$")
+SEARCH_RANGE = re.compile(
+    r"^(\d{4}-\d{2}(?:-\d{2})?)(?:\.\.(\d{4}-\d{2}(?:-\d{2})?))?$"
+)
+SEARCH_WORD = re.compile(r"\w+")
+_CATEGORY_LOOKUP = {c.lower(): c for c in ALL_CATEGORIES}
+
+
+def _months_back(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _date_bounds(text):
+    # "2025-10" یا "2025-10-05" -> (ابتدا، انتهای بسته)
+    if len(text) == 7:
+        return text + "-01 00:00", text + "-31 23:59"
+    return text + " 00:00", text + " 23:59"
+
+
+def build_search(text, today=None, has_fts=True):
+    # خروجی (where, params) برای LedgerStore.page/count؛ متن خالی None
+    today = today or date.today()
+    clauses, params, words = [], [], []
+    for part in SEARCH_SPLIT.split(text.lower()):
+        part = part.strip()
+        if not part:
+            continue
+        m = SEARCH_AMOUNT.match(part)
+        if m:
+            clauses.append(f"abs(amount) {m.group(1)} ?")
+            params.append(to_cents(Decimal(m.group(2).replace(",", ""))))
+            continue
+        m = SEARCH_LAST.match(part)
+        if m:
+            n, unit = int(m.group(1)), m.group(2)
+            if unit in ("day", "week"):
+                since = date.fromordinal(
+                    today.toordinal() - n * (7 if unit == "week" else 1)
+                )
+            else:
+                since = _months_back(today, n * (12 if unit == "year" else 1))
+            clauses.append("date >= ?")
+            params.append(since.strftime("%Y-%m-%d"))
+            continue
+        if part in ("this month", "today"):
+            since = today.strftime("%Y-%m-01" if part == "this month" else "%Y-%m-%d")
+            clauses.append("date >= ?")
+            params.append(since)
+            continue
+        m = SEARCH_RANGE.match(part)
+        if m:
+            start = _date_bounds(m.group(1))[0]
+            end = _date_bounds(m.group(2) or m.group(1))[1]
+            clauses.append("date BETWEEN ? AND ?")
+            params.extend((start, end))
+            continue
+        if part in ("income", "expense"):
+            clauses.append("type = ?")
+            params.append(part.capitalize())
+            continue
+        if part in _CATEGORY_LOOKUP:
+            clauses.append("category = ?")
+            params.append(_CATEGORY_LOOKUP[part])
+            continue
+        words.extend(SEARCH_WORD.findall(part))
+    if words and has_fts:
+        clauses.append("id IN (SELECT rowid FROM tx_fts WHERE tx_fts MATCH ?)")
+        params.append(" ".join(f'"{w}"*' for w in words))
+    else:
+        for w in words:
+            clauses.append("(description LIKE ? OR category LIKE ?)")
+            params.extend((f"%{w}%", f"%{w}%"))
+    if not clauses:
+        return None
+    return " AND ".join(clauses), tuple(params)
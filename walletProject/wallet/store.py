@@ -0,0 +1,494 @@
+import json
+import os
+import sqlite3
+from collections import Counter
+from decimal import Decimal
+
+from .config import BASE_CURRENCY, DB_PATH, DEFAULT_ACCOUNT, EXPORT_CHUNK
+from .money import from_cents, to_cents
+from .timeutil import day_to_date
+from .transaction import make_transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    amount      INTEGER NOT NULL,
+    type        TEXT    NOT NULL,
+    category    TEXT    NOT NULL,
+    description TEXT    NOT NULL DEFAULT '',
+    date        TEXT    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tx_date ON transactions(date);
+CREATE INDEX IF NOT EXISTS idx_tx_category ON transactions(category, date);
+CREATE INDEX IF NOT EXISTS idx_tx_type ON transactions(type, amount);
+"""
+ROLLUPS = (("daily_rollup", 10), ("monthly_rollup", 7))  # (جدول، طول پیشوند date)
+
+
+def _rollup_upsert(table, width, row, sign):
+    return f"""
+        INSERT INTO {table} (period, category, income, expense, n, n_exp)
+        VALUES (substr({row}.date, 1, {width}), {row}.category,
+                {sign} * max({row}.amount, 0), {sign} * max(-{row}.amount, 0),
+                {sign}, {sign} * ({row}.amount < 0))
+        ON CONFLICT (period, category) DO UPDATE SET
+            income = income + excluded.income,
+            expense = expense + excluded.expense,
+            n = n + excluded.n,
+            n_exp = n_exp + excluded.n_exp;"""
+
+
+def _rollup_prune(table, width):
+    return f"""
+        DELETE FROM {table}
+        WHERE period = substr(old.date, 1, {width})
+          AND category = old.category AND n = 0;"""
+
+
+def rollup_migration():
+    parts = []
+    for table, width in ROLLUPS:
+        parts.append(f"""
+    CREATE TABLE IF NOT EXISTS {table} (
+        period   TEXT    NOT NULL,
+        category TEXT    NOT NULL,
+        income   INTEGER NOT NULL,
+        expense  INTEGER NOT NULL,
+        n        INTEGER NOT NULL,
+        n_exp    INTEGER NOT NULL,
+        PRIMARY KEY (period, category)
+    ) WITHOUT ROWID;
+    INSERT INTO {table}
+    SELECT substr(date, 1, {width}), category,
+           SUM(max(amount, 0)), SUM(max(-amount, 0)), COUNT(*), SUM(amount < 0)
+    FROM transactions GROUP BY 1, 2;""")
+    add = "".join(_rollup_upsert(t, w, "new", 1) for t, w in ROLLUPS)
+    drop = "".join(
+        _rollup_upsert(t, w, "old", -1) + _rollup_prune(t, w) for t, w in ROLLUPS
+    )
+    parts.append(f"""
+    CREATE TRIGGER IF NOT EXISTS tx_rollup_ai AFTER INSERT ON transactions BEGIN{add}
+    END;
+    CREATE TRIGGER IF NOT EXISTS tx_rollup_ad AFTER DELETE ON transactions BEGIN{drop}
+    END;
+    CREATE TRIGGER IF NOT EXISTS tx_rollup_au
+    AFTER UPDATE OF amount, category, date ON transactions BEGIN{drop}{add}
+    END;
+""")
+    return "".join(parts)
+
+
+# هر مورد یک نسخهٔ schema است (PRAGMA user_version)
+MIGRATIONS = [
+    # 1: جستجوی متنی (FTS5 هم‌گام با triggerها) و ایندکس مبلغ مطلق
+    """
+    CREATE INDEX IF NOT EXISTS idx_tx_abs_amount ON transactions(abs(amount));
+    CREATE VIRTUAL TABLE IF NOT EXISTS tx_fts USING fts5(
+        description, category, content='transactions', content_rowid='id'
+    );
+    CREATE TRIGGER IF NOT EXISTS tx_fts_ai AFTER INSERT ON transactions BEGIN
+        INSERT INTO tx_fts(rowid, description, category)
+        VALUES (new.id, new.description, new.category);
+    END;
+    CREATE TRIGGER IF NOT EXISTS tx_fts_ad AFTER DELETE ON transactions BEGIN
+        INSERT INTO tx_fts(tx_fts, rowid, description, category)
+        VALUES ('delete', old.id, old.description, old.category);
+    END;
+    CREATE TRIGGER IF NOT EXISTS tx_fts_au AFTER UPDATE ON transactions BEGIN
+        INSERT INTO tx_fts(tx_fts, rowid, description, category)
+        VALUES ('delete', old.id, old.description, old.category);
+        INSERT INTO tx_fts(rowid, description, category)
+        VALUES (new.id, new.description, new.category);
+    END;
+    INSERT INTO tx_fts(tx_fts) VALUES ('rebuild');
+    """,
+    # 2: بودجه‌ها؛ scope خالی = کل هزینه‌ها، month خالی = همهٔ ماه‌ها
+    """
+    CREATE TABLE IF NOT EXISTS budgets (
+        scope  TEXT    NOT NULL,
+        month  TEXT    NOT NULL,
+        amount INTEGER NOT NULL,
+        PRIMARY KEY (scope, month)
+    );
+    """,
+    # 3: جمع روزانه و ماهانه به تفکیک دسته؛ triggerها هنگام درج/حذف نگهش می‌دارند
+    rollup_migration(),
+    # 4: حساب‌ها و ارز هر تراکنش؛ orig_amount خالی یعنی همان amount
+    f"""
+    ALTER TABLE transactions
+        ADD COLUMN account TEXT NOT NULL DEFAULT '{DEFAULT_ACCOUNT}';
+    ALTER TABLE transactions
+        ADD COLUMN currency TEXT NOT NULL DEFAULT '{BASE_CURRENCY}';
+    ALTER TABLE transactions ADD COLUMN orig_amount INTEGER;
+    CREATE INDEX IF NOT EXISTS idx_tx_currency ON transactions(currency)
+        WHERE currency != '{BASE_CURRENCY}';
+    CREATE TABLE IF NOT EXISTS accounts (
+        name     TEXT PRIMARY KEY,
+        currency TEXT NOT NULL
+    );
+    INSERT OR IGNORE INTO accounts VALUES ('{DEFAULT_ACCOUNT}', '{BASE_CURRENCY}');
+    CREATE TABLE IF NOT EXISTS fx_rates (
+        currency TEXT NOT NULL,
+        day      TEXT NOT NULL,
+        rate     TEXT NOT NULL,
+        PRIMARY KEY (currency, day)
+    ) WITHOUT ROWID;
+    """,
+    # 5: تراکنش‌های تکراری؛ amount به ارز حساب، next_due سررسید بعدی
+    f"""
+    CREATE TABLE IF NOT EXISTS recurring (
+        id          INTEGER PRIMARY KEY,
+        amount      INTEGER NOT NULL,
+        category    TEXT    NOT NULL,
+        description TEXT    NOT NULL DEFAULT '',
+        account     TEXT    NOT NULL DEFAULT '{DEFAULT_ACCOUNT}',
+        currency    TEXT    NOT NULL DEFAULT '{BASE_CURRENCY}',
+        freq        TEXT    NOT NULL,
+        every       INTEGER NOT NULL DEFAULT 1,
+        anchor      INTEGER NOT NULL,
+        next_due    TEXT    NOT NULL,
+        until       TEXT
+    );
+    """,
+    # 6: شناسهٔ FITID تراکنش‌های واردشده از OFX (همراه ACCTID) برای تشخیص تکرار
+    """
+    CREATE TABLE IF NOT EXISTS ofx_fitids (fitid TEXT PRIMARY KEY) WITHOUT ROWID;
+    """,
+]
+TX_COLUMNS = "amount, type, category, description, date, account, currency, orig_amount"
+INSERT_SQL = f"INSERT INTO transactions ({TX_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+RULE_COLUMNS = (
+    "amount, category, description, account, currency, freq, every, anchor,"
+    " next_due, until"
+)
+RESTORE_SQL = (
+    f"INSERT INTO transactions (id, {TX_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+class LedgerStore:
+    # amount به صورت سنت (عدد صحیح) ذخیره می‌شود تا SUM در دیتابیس دقیق باشد
+    def __init__(self, path=DB_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        if path == ":memory:":
+            # حافظهٔ مشترک تا اتصال‌های thread دیگر هم همین دیتابیس را ببینند
+            self._uri = f"file:wallet-{id(self)}?mode=memory&cache=shared"
+        else:
+            self._uri = "file:" + os.path.abspath(path)
+        self.conn = self.reader()
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        self.has_fts = bool(
+            self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'tx_fts'"
+            ).fetchone()
+        )
+
+    def _migrate(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, script in enumerate(MIGRATIONS[version:], version + 1):
+            try:
+                self.conn.executescript(script)
+            except sqlite3.OperationalError as e:
+                # SQLite بدون FTS5؛ جستجو با LIKE انجام می‌شود
+                if "fts5" not in str(e):
+                    raise
+            self.conn.execute(f"PRAGMA user_version = {number}")
+
+    def reader(self):
+        # هر thread باید اتصال خودش را داشته باشد
+        conn = sqlite3.connect(self._uri, uri=True)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def optimize(self):
+        # آمار ANALYZE برای انتخاب درست ایندکس در فیلترهای جستجو
+        self.conn.execute("PRAGMA optimize")
+
+    def close(self):
+        self.optimize()
+        self.conn.close()
+
+    @staticmethod
+    def _row_to_tx(row):
+        orig = row["orig_amount"]
+        return make_transaction(
+            from_cents(row["amount"]),
+            row["category"],
+            row["description"],
+            row["date"],
+            row["id"],
+            row["account"],
+            row["currency"],
+            None if orig is None else from_cents(orig),
+        )
+
+    @staticmethod
+    def _params(t):
+        # به ترتیب TX_COLUMNS
+        return (
+            to_cents(t.amount),
+            t.type,
+            t.category,
+            t.description,
+            t.date,
+            t.account,
+            t.currency,
+            to_cents(t.orig_amount),
+        )
+
+    def add_many(self, transactions):
+        # همه در یک تراکنش دیتابیس؛ id هر ردیف روی خود تراکنش نوشته می‌شود
+        with self.conn:
+            cur = self.conn.cursor()
+            for t in transactions:
+                cur.execute(INSERT_SQL, self._params(t))
+                t.id = cur.lastrowid
+        return transactions
+
+    def insert_batch(self, transactions, fitids=()):
+        # بدون commit؛ فراخواننده کل ورود را در یک تراکنش دیتابیس نگه می‌دارد
+        self.conn.executemany(INSERT_SQL, [self._params(t) for t in transactions])
+        self.conn.executemany(
+            "INSERT INTO ofx_fitids (fitid) VALUES (?)", [(f,) for f in fitids]
+        )
+
+    def existing_counts(self, date_from, date_to):
+        # (date, amount, category, description) -> تعداد ردیف‌ها با همین کلید
+        rows = self.conn.execute(
+            "SELECT date, amount, category, description, COUNT(*) FROM transactions"
+            " WHERE date BETWEEN ? AND ? GROUP BY 1, 2, 3, 4",
+            (date_from, date_to),
+        )
+        return Counter({tuple(r)[:4]: r[4] for r in rows})
+
+    def known_fitids(self, fitids):
+        rows = self.conn.execute(
+            "SELECT fitid FROM ofx_fitids"
+            " WHERE fitid IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(fitids)),),
+        )
+        return {r[0] for r in rows}
+
+    def get(self, tx_id):
+        row = self.conn.execute(
+            "SELECT * FROM transactions WHERE id = ?", (tx_id,)
+        ).fetchone()
+        return self._row_to_tx(row) if row else None
+
+    def update(self, tr):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE transactions SET amount = ?, type = ?, category = ?,"
+                " description = ?, date = ?, account = ?, currency = ?,"
+                " orig_amount = ? WHERE id = ?",
+                (*self._params(tr), tr.id),
+            )
+
+    def replace(self, delete_ids=(), restore=()):
+        # حذف و بازگرداندن (با همان id) در یک تراکنش دیتابیس؛ برای حذف و undo
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM transactions WHERE id = ?", [(i,) for i in delete_ids]
+            )
+            self.conn.executemany(
+                RESTORE_SQL, [(t.id, *self._params(t)) for t in restore]
+            )
+
+    def clear(self):
+        # sqlite_sequence حفظ می‌شود تا idها دوباره استفاده نشوند
+        with self.conn:
+            self.conn.execute("DELETE FROM transactions")
+            self.conn.execute("DELETE FROM ofx_fitids")
+
+    def count(self, where=None) -> int:
+        sql, params = where or ("1", ())
+        return self.conn.execute(
+            f"SELECT COUNT(*) FROM transactions WHERE {sql}", params
+        ).fetchone()[0]
+
+    def page(self, offset, limit, where=None):
+        # جدیدترین‌ها اول؛ where خروجی build_search است
+        sql, params = where or ("1", ())
+        rows = self.conn.execute(
+            f"SELECT * FROM transactions WHERE {sql}"
+            " ORDER BY id DESC LIMIT ? OFFSET ?",
+            (*params, limit, offset),
+        )
+        return [self._row_to_tx(r) for r in rows]
+
+    def iter_rows(self):
+        for row in self.conn.execute("SELECT * FROM transactions ORDER BY id"):
+            yield self._row_to_tx(row)
+
+    @staticmethod
+    def iter_chunks(conn, size=EXPORT_CHUNK):
+        # پیمایش کلید اصلی به ترتیب id؛ بدون مرتب‌سازی و بدون کپی کامل
+        cur = conn.execute(
+            "SELECT id, amount, type, category, description, date,"
+            " account, currency, COALESCE(orig_amount, amount)"
+            " FROM transactions ORDER BY id"
+        )
+        while True:
+            rows = cur.fetchmany(size)
+            if not rows:
+                break
+            yield rows
+
+    # جمع‌ها از جدول‌های rollup خوانده می‌شوند، نه از کل تراکنش‌ها
+    def month_totals(self):
+        return self.conn.execute(
+            "SELECT period AS ym, SUM(income) AS income, SUM(expense) AS expense,"
+            " SUM(n) AS n, SUM(n_exp) AS n_exp FROM monthly_rollup GROUP BY period"
+        ).fetchall()
+
+    def category_expenses(self):
+        return self.conn.execute(
+            "SELECT category, SUM(expense) AS expense, SUM(n_exp) AS n"
+            " FROM monthly_rollup GROUP BY category HAVING SUM(n_exp) > 0"
+        ).fetchall()
+
+    def month_category_expenses(self):
+        return self.conn.execute(
+            "SELECT period AS ym, category, expense FROM monthly_rollup"
+            " WHERE n_exp > 0"
+        ).fetchall()
+
+    def day_totals(self):
+        return self.conn.execute(
+            "SELECT period AS day, category, income, expense, n, n_exp"
+            " FROM daily_rollup"
+        ).fetchall()
+
+    def day_totals_between(self, first, last):
+        # first و last شمارهٔ روز (شامل هر دو)
+        return self.conn.execute(
+            "SELECT period AS day, category, income, expense, n, n_exp"
+            " FROM daily_rollup WHERE period BETWEEN ? AND ?",
+            (day_to_date(first).isoformat(), day_to_date(last).isoformat()),
+        ).fetchall()
+
+    def largest_expense_between(self, first, last):
+        # first و last شمارهٔ روز (شامل هر دو)
+        row = self.conn.execute(
+            "SELECT MIN(amount) FROM transactions"
+            " WHERE date >= ? AND date < ? AND amount < 0",
+            (day_to_date(first).isoformat(), day_to_date(last + 1).isoformat()),
+        ).fetchone()
+        return from_cents(-row[0]) if row[0] is not None else Decimal("0")
+
+    def load_budgets(self):
+        rows = self.conn.execute("SELECT scope, month, amount FROM budgets")
+        return {(r["scope"], r["month"]): from_cents(r["amount"]) for r in rows}
+
+    def save_budget(self, scope, month, amount):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO budgets (scope, month, amount)"
+                " VALUES (?, ?, ?)",
+                (scope, month, to_cents(amount)),
+            )
+
+    def accounts(self):
+        rows = self.conn.execute("SELECT name, currency FROM accounts ORDER BY rowid")
+        return {r["name"]: r["currency"] for r in rows}
+
+    def add_account(self, name, currency):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO accounts (name, currency) VALUES (?, ?)", (name, currency)
+            )
+
+    def ensure_accounts(self, pairs):
+        # بدون commit؛ حساب‌های تازه در فایل ورودی ثبت می‌شوند
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO accounts (name, currency) VALUES (?, ?)", pairs
+        )
+
+    def account_balances(self):
+        return self.conn.execute(
+            "SELECT account, currency, SUM(COALESCE(orig_amount, amount)) AS orig,"
+            " SUM(amount) AS base FROM transactions GROUP BY account, currency"
+        ).fetchall()
+
+    def load_rates(self):
+        return self.conn.execute("SELECT currency, day, rate FROM fx_rates").fetchall()
+
+    def save_rates(self, rows):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO fx_rates (currency, day, rate) VALUES (?, ?, ?)",
+                rows,
+            )
+
+    def rebase(self, currency, fx):
+        # بعد از تغییر نرخ‌ها، amount ردیف‌های این ارز دوباره محاسبه می‌شود
+        rows = self.conn.execute(
+            "SELECT id, date, amount, COALESCE(orig_amount, amount) FROM transactions"
+            " WHERE currency = ?",
+            (currency,),
+        ).fetchall()
+        changed = []
+        for tx_id, dt_str, cents, orig in rows:
+            base = to_cents(fx.to_base(from_cents(orig), currency, dt_str))
+            if base != cents:
+                changed.append((base, "Income" if base >= 0 else "Expense", tx_id))
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE transactions SET amount = ?, type = ? WHERE id = ?", changed
+            )
+        return len(changed)
+
+    def load_rules(self):
+        return self.conn.execute(
+            f"SELECT id, {RULE_COLUMNS} FROM recurring ORDER BY id"
+        ).fetchall()
+
+    def add_rule(self, params):
+        with self.conn:
+            cur = self.conn.execute(
+                f"INSERT INTO recurring ({RULE_COLUMNS})"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                params,
+            )
+        return cur.lastrowid
+
+    def delete_rule(self, rule_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM recurring WHERE id = ?", (rule_id,))
+
+    def add_recurring(self, transactions, advances):
+        # ردیف‌های سررسیده و next_due جدید قواعد در یک تراکنش دیتابیس؛
+        # اگر نیمه‌کاره بماند هیچ‌کدام ثبت نمی‌شود و ردیف تکراری ساخته نمی‌شود
+        with self.conn:
+            cur = self.conn.cursor()
+            for t in transactions:
+                cur.execute(INSERT_SQL, self._params(t))
+                t.id = cur.lastrowid
+            cur.executemany("UPDATE recurring SET next_due = ? WHERE id = ?", advances)
+        return transactions
+
+    def largest_expenses(self, limit):
+        rows = self.conn.execute(
+            "SELECT amount FROM transactions WHERE type = 'Expense'"
+            " ORDER BY amount LIMIT ?",
+            (limit,),
+        )
+        return [from_cents(-r[0]) for r in rows]
+
+
+class LedgerReader:
+    # پرس‌وجوهای بازه روی اتصال جدا؛ فقط در thread سازنده استفاده شود
+    def __init__(self, store):
+        self.conn = store.reader()
+
+    day_totals_between = LedgerStore.day_totals_between
+    largest_expense_between = LedgerStore.largest_expense_between
+
+    def close(self):
+        self.conn.close()
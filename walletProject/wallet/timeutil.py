@@ -0,0 +1,116 @@
+import sys
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from .config import DATE_FMT, EPOCH_ORDINAL, MAX_BUCKETS
+
+
+def is_fixed_format(dt_str: str) -> bool:
+    # "YYYY-MM-DD HH:MM" بدون فراخوانی strptime
+    return (
+        len(dt_str) == 16
+        and dt_str[4] == "-"
+        and dt_str[7] == "-"
+        and dt_str[10] == " "
+        and dt_str[13] == ":"
+    )
+
+
+@lru_cache(maxsize=8192)
+def day_number(day: str) -> int:
+    # روزهای پس از 1970-01-01؛ تاریخ‌های تکراری فقط یک بار پارس می‌شوند
+    d = date(int(day[0:4]), int(day[5:7]), int(day[8:10]))
+    return d.toordinal() - EPOCH_ORDINAL
+
+
+def parse_ts(dt_str: str) -> int:
+    # دقیقه از ابتدای epoch
+    if is_fixed_format(dt_str):
+        try:
+            hour, minute = int(dt_str[11:13]), int(dt_str[14:16])
+            if hour < 24 and minute < 60:
+                return day_number(dt_str[:10]) * 1440 + hour * 60 + minute
+        except ValueError:
+            pass
+    dt = datetime.strptime(dt_str, DATE_FMT)
+    return (dt.toordinal() - EPOCH_ORDINAL) * 1440 + dt.hour * 60 + dt.minute
+
+
+def day_to_date(day: int) -> date:
+    return date.fromordinal(day + EPOCH_ORDINAL)
+
+
+@lru_cache(maxsize=8192)
+def day_string(day: int) -> str:
+    return day_to_date(day).isoformat()
+
+
+# بدون سقف: هر روز تقویم یک مدخل (~365 در سال)؛ سقف 1024 روی دفترهای بیش از
+# حدود سه سال مدام بیرون‌اندازی و دوباره‌سازی می‌کرد
+@lru_cache(maxsize=None)
+def day_month(day: int) -> str:
+    return sys.intern(day_string(day)[:7])
+
+
+def format_ts(ts: int) -> str:
+    # عکس parse_ts با قالب DATE_FMT
+    day, minute = divmod(ts, 1440)
+    return f"{day_string(day)} {minute // 60:02d}:{minute % 60:02d}"
+
+
+def month_key(dt_str: str) -> str:
+    if is_fixed_format(dt_str) and dt_str[:4].isdigit() and dt_str[5:7].isdigit():
+        return sys.intern(dt_str[:7])
+    return sys.intern(datetime.strptime(dt_str, DATE_FMT).strftime("%Y-%m"))
+
+
+# بازه‌ها با شمارهٔ روز (از 1970-01-01) و حداکثر MAX_BUCKETS ستون
+RANGES = ["All time", "This week", "This month", "This quarter", "This year", "Custom"]
+
+
+def _add_months(d, n):
+    y, m = divmod(d.year * 12 + d.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def range_bounds(name, today=None):
+    today = today or date.today()
+    if name == "This week":
+        first = today - timedelta(days=today.weekday())
+        last = first + timedelta(days=6)
+    elif name == "This month":
+        first = today.replace(day=1)
+        last = _add_months(first, 1) - timedelta(days=1)
+    elif name == "This quarter":
+        first = date(today.year, (today.month - 1) // 3 * 3 + 1, 1)
+        last = _add_months(first, 3) - timedelta(days=1)
+    elif name == "This year":
+        first, last = date(today.year, 1, 1), date(today.year, 12, 31)
+    else:
+        return None
+    return first.toordinal() - EPOCH_ORDINAL, last.toordinal() - EPOCH_ORDINAL
+
+
+def range_buckets(first, last):
+    # روزانه تا MAX_BUCKETS روز، هفتگی تا MAX_BUCKETS هفته، وگرنه ماهانه
+    # (چندماهه برای بازهٔ بلند)؛ هرگز بیش از MAX_BUCKETS ستون
+    span = last - first + 1
+    if span <= MAX_BUCKETS:
+        return [
+            (day_to_date(d).strftime("%m-%d"), d, d) for d in range(first, last + 1)
+        ]
+    if span <= 7 * MAX_BUCKETS:
+        return [
+            (day_to_date(d).strftime("%m-%d"), d, min(d + 6, last))
+            for d in range(first, last + 1, 7)
+        ]
+    start, end = day_to_date(first), day_to_date(last)
+    months = (end.year - start.year) * 12 + end.month - start.month + 1
+    step = -(-months // MAX_BUCKETS)
+    buckets = []
+    for i in range(0, months, step):
+        lo = _add_months(start.replace(day=1), i)
+        hi = _add_months(lo, step).toordinal() - EPOCH_ORDINAL - 1
+        lo_day = max(first, lo.toordinal() - EPOCH_ORDINAL)
+        buckets.append((lo.strftime("%Y-%m"), lo_day, min(hi, last)))
+    return buckets
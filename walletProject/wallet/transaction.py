@@ -0,0 +1,85 @@
+from sys import intern
+
+from .config import BASE_CURRENCY, DEFAULT_ACCOUNT
+from .timeutil import day_month, format_ts, parse_ts
+
+
+class Transaction:
+    # یک ردیف دفتر با __slots__ به‌جای dict؛ تاریخ فقط به‌صورت ts (دقیقه از epoch)
+    # نگه داشته می‌شود و type/date/ym از روی amount و ts ساخته می‌شوند.
+    # دسته، حساب و ارز intern می‌شوند تا ردیف‌ها یک رشتهٔ مشترک داشته باشند
+    __slots__ = (
+        "id",
+        "amount",
+        "category",
+        "description",
+        "ts",
+        "account",
+        "currency",
+        "orig_amount",
+    )
+
+    def __init__(
+        self,
+        amount,
+        category,
+        description,
+        ts,
+        tx_id=None,
+        account=DEFAULT_ACCOUNT,
+        currency=BASE_CURRENCY,
+        orig_amount=None,
+    ):
+        # amount همیشه به ارز پایه است؛ orig_amount مبلغ به ارز حساب
+        self.id = tx_id
+        self.amount = amount
+        self.category = intern(category)
+        self.description = description
+        self.ts = ts
+        self.account = intern(account)
+        self.currency = intern(currency)
+        self.orig_amount = amount if orig_amount is None else orig_amount
+
+    @property
+    def type(self):
+        return "Income" if self.amount >= 0 else "Expense"
+
+    @property
+    def day(self):
+        return self.ts // 1440
+
+    @property
+    def date(self):
+        return format_ts(self.ts)
+
+    @property
+    def ym(self):
+        return day_month(self.ts // 1440)
+
+    def __repr__(self):
+        return (
+            f"Transaction(id={self.id}, amount={self.amount}, "
+            f"category={self.category!r}, date={self.date!r})"
+        )
+
+
+def make_transaction(
+    amount,
+    category,
+    description,
+    dt_str,
+    tx_id=None,
+    account=DEFAULT_ACCOUNT,
+    currency=BASE_CURRENCY,
+    orig_amount=None,
+):
+    return Transaction(
+        amount,
+        category,
+        description,
+        parse_ts(dt_str),
+        tx_id,
+        account,
+        currency,
+        orig_amount,
+    )